@@ -6,12 +6,18 @@ from flask_cors import CORS
 from flask_restx import Api
 from flask_jwt_extended import JWTManager
 
+from app._utils.metrics import init_metrics
 from app.database import init_db, db
 from app.user.controller import api as userapi
 from app.user.controller import meapi as meapi
+from app.user.controller import user_service
+from app.user.identity import UserIdentity, view_trusts_token_claims
 from app.weather.controller import api as weatherapi
+from app.weather.service import weather_service
+from app.weather.cli import weather_cli
 from app.tabs.controller import api as tabsapi
 from app.search.controller import api as searchapi
+from app.search.controller import search_service
 
 load_dotenv("./.env.local")
 
@@ -36,19 +42,40 @@ def create_app():
     # init database
     init_db(app)
 
+    # Request/SQL/outbound timings: Server-Timing header and /metrics
+    init_metrics(app)
+
+    # Build the in-memory station indexes once (retried lazily on first lookup if this fails)
+    with app.app_context():
+        try:
+            count = weather_service.load_station_index()
+            print(f"📍 Station index ready: {count} stations")
+        except Exception as e:
+            print(f"⚠️  Station index not built at startup: {e}")
+        try:
+            count = search_service.load_search_index()
+            print(f"🔎 Search index ready: {count} stations")
+        except Exception as e:
+            print(f"⚠️  Search index not built at startup: {e}")
+
     # JWT
     jwt = JWTManager(app)
 
-    # User loader callback for JWT
+    # User loader callback for JWT: claims for @trust_token_claims endpoints, else a cached lookup
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
-        identity = jwt_data["sub"]
-        from app.user.model import User
-        return User.query.filter_by(uid=identity).first()
+        if view_trusts_token_claims():
+            identity = UserIdentity.from_claims(jwt_data)
+            if identity is not None:
+                return identity
+        return user_service.get_identity(jwt_data["sub"])
 
     # CORS
     CORS(app)
 
+    # CLI commands (flask --app server weather ...)
+    app.cli.add_command(weather_cli)
+
     # Register blueprint
     api.add_namespace(userapi)
     api.add_namespace(meapi)
@@ -0,0 +1,283 @@
+"""
+Outbound HTTP client for external providers (Nominatim, Open-Meteo, ...).
+
+One `HttpClient` per provider keeps a keep-alive connection pool (per process),
+retries transient failures with jittered exponential backoff (or the provider's
+Retry-After) inside a total time budget, optionally spaces calls `min_interval`
+seconds apart (e.g. Nominatim's 1 request/s policy), fails fast through a circuit
+breaker while the provider is down, and counts calls, errors and latency for
+monitoring.
+"""
+import contextvars
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app._utils.metrics import record
+
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised without calling the provider while its circuit breaker is open"""
+
+
+class ThrottledError(requests.Timeout):
+    """No request slot (min_interval / Retry-After) free within the time budget; the provider wasn't called"""
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures, lets one trial call through after `cooldown` seconds"""
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.cooldown else 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True  # half-open: a single probe
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+    def release(self) -> None:
+        """A call ended without reaching the provider: let the next one probe instead"""
+        with self._lock:
+            self._trial = False
+
+
+# Absolute time.monotonic() every call in this context must finish by (see call_deadline)
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("http_deadline", default=None)
+
+
+@contextmanager
+def call_deadline(seconds: float):
+    """Cap the budget of every HttpClient call made inside the block (and its copied contexts)"""
+    outer = _deadline.get()
+    limit = time.monotonic() + seconds
+    token = _deadline.set(limit if outer is None else min(outer, limit))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), None if absent/invalid"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpClient:
+    """Pooled, retrying, circuit-broken HTTP client for one provider"""
+
+    def __init__(
+        self,
+        name: str,
+        headers: Optional[dict] = None,
+        timeout: float = 5.0,
+        budget: float = 12.0,
+        retries: int = 2,
+        backoff: float = 0.25,
+        pool_size: int = 10,
+        min_interval: float = 0.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.name = name
+        self.headers = headers or {}
+        self.timeout = timeout  # per attempt
+        self.budget = budget  # all attempts and backoff sleeps together
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.min_interval = min_interval  # between attempts, retries included (per process)
+        self.breaker = breaker or CircuitBreaker()
+        self._next_slot = 0.0
+        self._slot_lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self._session_pid: Optional[int] = None
+        self._session_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'errors': 0, 'retries': 0, 'rejected': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+
+    @property
+    def session(self) -> requests.Session:
+        """Keep-alive session, recreated after fork so workers don't share sockets"""
+        if self._session is None or self._session_pid != os.getpid():
+            with self._session_lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers.update(self.headers)
+                    self._session, self._session_pid = session, os.getpid()
+        return self._session
+
+    def get(self, url: str, params: Optional[dict] = None, budget: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        GET with retries on connection errors and 429/5xx, all within `budget` seconds
+        (less inside a call_deadline block).
+        Raises CircuitOpenError while the provider is failing, requests exceptions otherwise.
+        """
+        deadline = time.monotonic() + (budget if budget is not None else self.budget)
+        if _deadline.get() is not None:
+            deadline = min(deadline, _deadline.get())
+        if deadline - time.monotonic() < 0.1:
+            raise ThrottledError(f"{self.name}: no time left for the call")
+
+        if not self.breaker.allow():
+            self._count('rejected')
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open), try again later")
+
+        try:
+            response = self._get_with_retries(url, params, deadline, **kwargs)
+        except ThrottledError:
+            self.breaker.release()
+            raise
+        except BaseException:
+            # Every admitted call reports back, or a half-open probe would keep the circuit open for good
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        response.raise_for_status()  # non-retryable 4xx are the caller's problem, not an outage
+        return response
+
+    def _get_with_retries(self, url: str, params: Optional[dict], deadline: float, **kwargs) -> requests.Response:
+        attempt = 0
+        last_error = None
+        while True:
+            try:
+                self._wait_for_slot(deadline)
+            except ThrottledError:
+                if last_error is not None:
+                    raise last_error  # the provider did fail; report that, not our own spacing
+                raise
+            timeout = min(self.timeout, deadline - time.monotonic())
+            start = time.monotonic()
+            error = None
+            delay = None
+            try:
+                response = self.session.get(url, params=params, timeout=timeout, **kwargs)
+                if response.status_code in RETRY_STATUSES:
+                    error = requests.HTTPError(f"{response.status_code} from {self.name}", response=response)
+                    delay = retry_after(response)
+                    response.close()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except Exception:
+                # Not transient (bad URL, too many redirects, ...): no retry
+                self._observe(time.monotonic() - start, True)
+                raise
+            self._observe(time.monotonic() - start, error is not None)
+
+            if error is None:
+                return response
+
+            if delay is not None:
+                # The provider said when to come back: hold every caller of this client until then
+                self._defer_slots(delay)
+            else:
+                # Full jitter: sleep uniformly in [0, backoff * 2^attempt]
+                delay = random.uniform(0, self.backoff * (2 ** attempt))
+            if attempt >= self.retries or time.monotonic() + delay + 0.1 >= deadline:
+                raise error
+            last_error = error
+            attempt += 1
+            self._count('retries')
+            time.sleep(delay)
+
+    def _wait_for_slot(self, deadline: float) -> None:
+        """Reserve the next min_interval slot (only the reservation is locked) and sleep until it"""
+        with self._slot_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            if slot > now and slot + 0.1 >= deadline:
+                raise ThrottledError(f"{self.name}: no request slot free within the time budget")
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _defer_slots(self, seconds: float) -> None:
+        with self._slot_lock:
+            self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _observe(self, seconds: float, failed: bool) -> None:
+        record('http', self.name, seconds, failed)
+        ms = seconds * 1000
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            self._stats['errors'] += failed
+            self._stats['total_ms'] += ms
+            self._stats['max_ms'] = max(self._stats['max_ms'], ms)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['avg_ms'] = round(stats['total_ms'] / stats['requests'], 2) if stats['requests'] else None
+        stats['total_ms'] = round(stats['total_ms'], 2)
+        stats['max_ms'] = round(stats['max_ms'], 2)
+        stats['circuit'] = self.breaker.state
+        return stats
+
+
+_clients: Dict[str, HttpClient] = {}
+
+
+def get_client(name: str, **kwargs) -> HttpClient:
+    """Shared client for a provider, created with `kwargs` on first use"""
+    client = _clients.get(name)
+    if client is None:
+        client = _clients.setdefault(name, HttpClient(name, **kwargs))
+    return client
+
+
+def provider_stats() -> Dict[str, dict]:
+    """Latency/error counters and circuit state of every provider client"""
+    return {name: client.stats() for name, client in _clients.items()}
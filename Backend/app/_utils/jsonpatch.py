@@ -0,0 +1,110 @@
+"""
+Minimal JSON Patch (RFC 6902) with JSON Pointers (RFC 6901).
+
+Supports add, remove, replace, move, copy and test on dicts/lists. `apply_patch`
+works on a deep copy and either applies every operation or raises JsonPatchError.
+"""
+import copy
+from typing import Any, List, Tuple
+
+
+class JsonPatchError(ValueError):
+    """Malformed patch, bad pointer, or failed `test` operation"""
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """'/a/b~1c/0' -> ['a', 'b/c', '0']"""
+    if pointer == '':
+        return []
+    if not isinstance(pointer, str) or not pointer.startswith('/'):
+        raise JsonPatchError(f"Invalid JSON pointer '{pointer}'")
+    return [part.replace('~1', '/').replace('~0', '~') for part in pointer[1:].split('/')]
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if token == '-' and allow_end:
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token[0] == '0'):
+        raise JsonPatchError(f"Invalid array index '{token}'")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index {index} out of range")
+    return index
+
+
+def _resolve(doc: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise JsonPatchError(f"Path segment '{token}' not found")
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_index(doc, token)]
+        else:
+            raise JsonPatchError(f"Cannot descend into {type(doc).__name__} at '{token}'")
+    return doc
+
+
+def _parent(doc: Any, pointer: str) -> Tuple[Any, str]:
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        raise JsonPatchError("Operations on the whole document are not supported")
+    return _resolve(doc, tokens[:-1]), tokens[-1]
+
+
+def _add(doc: Any, pointer: str, value: Any) -> None:
+    parent, key = _parent(doc, pointer)
+    if isinstance(parent, dict):
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, key, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to {type(parent).__name__}")
+
+
+def _remove(doc: Any, pointer: str) -> Any:
+    parent, key = _parent(doc, pointer)
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise JsonPatchError(f"Path '{pointer}' not found")
+        return parent.pop(key)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, key))
+    raise JsonPatchError(f"Cannot remove from {type(parent).__name__}")
+
+
+def apply_patch(doc: Any, operations: list) -> Any:
+    """Return a patched deep copy of doc"""
+    if not isinstance(operations, list):
+        raise JsonPatchError("A JSON Patch must be a list of operations")
+
+    doc = copy.deepcopy(doc)
+    for operation in operations:
+        if not isinstance(operation, dict) or 'op' not in operation or 'path' not in operation:
+            raise JsonPatchError(f"Invalid operation {operation!r}")
+        op, path = operation['op'], operation['path']
+
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise JsonPatchError(f"'{op}' needs a value")
+        if op in ('move', 'copy') and 'from' not in operation:
+            raise JsonPatchError(f"'{op}' needs a from pointer")
+
+        if op == 'add':
+            _add(doc, path, copy.deepcopy(operation['value']))
+        elif op == 'remove':
+            _remove(doc, path)
+        elif op == 'replace':
+            _remove(doc, path)
+            _add(doc, path, copy.deepcopy(operation['value']))
+        elif op == 'move':
+            if path.startswith(operation['from'] + '/'):
+                raise JsonPatchError("Cannot move a value into one of its children")
+            _add(doc, path, _remove(doc, operation['from']))
+        elif op == 'copy':
+            _add(doc, path, copy.deepcopy(_resolve(doc, parse_pointer(operation['from']))))
+        elif op == 'test':
+            if _resolve(doc, parse_pointer(path)) != operation['value']:
+                raise JsonPatchError(f"Test failed at '{path}'")
+        else:
+            raise JsonPatchError(f"Unknown operation '{op}'")
+    return doc
@@ -0,0 +1,268 @@
+"""
+Per-request performance instrumentation.
+
+`init_metrics(app)` times every request (per endpoint histogram), counts and times
+SQL through SQLAlchemy engine events, and collects outbound HTTP / LLM durations
+reported with `timed()` / `record()`. Each response gets a `Server-Timing` header
+(visible in the browser's network tab) and `/metrics` serves everything in the
+Prometheus text format.
+
+Metrics live in process memory: under gunicorn each worker keeps its own, and a
+scrape sees the worker that answered it. `/metrics` needs `Authorization: Bearer
+$METRICS_TOKEN`; without a token configured it only answers loopback clients.
+"""
+import contextvars
+import ipaddress
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from flask import Response, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...], buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            base = list(zip(self.labelnames, labels))
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_labels(base + [('le', _number(bound))])} {count}")
+            lines.append(f"{self.name}_bucket{_labels(base + [('le', '+Inf')])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(base)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(base)} {series[-1]}")
+        return lines
+
+
+def _number(value) -> str:
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by endpoint", ("method", "endpoint", "status"),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements per request", ("endpoint",), buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL per request", ("endpoint",),
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Individual SQL statement latency", ("backend",),
+)
+OUTBOUND_SECONDS = Histogram(
+    "outbound_call_duration_seconds", "Outbound call latency (kind=http|llm)", ("kind", "target", "outcome"),
+)
+
+
+class RequestTimings:
+    """Time and call counts accumulated by one request (including its worker threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals: Dict[str, list] = {}  # kind -> [seconds, count]
+
+    def add(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            total = self.totals.setdefault(kind, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+
+    def get(self, kind: str) -> Tuple[float, int]:
+        with self._lock:
+            seconds, count = self.totals.get(kind, (0.0, 0))
+        return seconds, count
+
+
+_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+
+def record(kind: str, target: str, seconds: float, failed: bool = False) -> None:
+    """Record an outbound call (kind 'http' or 'llm') against the histogram and the current request"""
+    OUTBOUND_SECONDS.observe(seconds, kind, target, "error" if failed else "ok")
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(kind, seconds)
+
+
+@contextmanager
+def timed(kind: str, target: str):
+    """with timed('llm', 'gpt-4o-mini'): ... records the block's duration"""
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        record(kind, target, time.perf_counter() - start, failed)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+    DB_QUERY_SECONDS.observe(seconds, conn.engine.url.get_backend_name())
+    timings = _timings.get()
+    if timings is not None:
+        timings.add("db", seconds)
+
+
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def server_timing(timings: RequestTimings, total: float) -> str:
+    parts = [f"app;dur={total * 1000:.1f}"]
+    for kind in ("db", "http", "llm"):
+        seconds, count = timings.get(kind)
+        if count:
+            parts.append(f'{kind};dur={seconds * 1000:.1f};desc="{count} call{"s" if count != 1 else ""}"')
+    return ", ".join(parts)
+
+
+def gauges() -> list:
+    """Point-in-time values: DB pools and provider clients"""
+    from app._utils.http_client import provider_stats
+    from app.database import db, pool_stats
+
+    lines = []
+    pools = [(bind or "primary", pool_stats(engine)) for bind, engine in db.engines.items()]
+    for name, key in (("db_pool_checked_out", "checked_out"), ("db_pool_checked_in", "checked_in"),
+                      ("db_pool_overflow", "overflow"), ("db_pool_waits_total", "waits"),
+                      ("db_pool_timeouts_total", "timeouts")):
+        kind = "counter" if name.endswith("_total") else "gauge"
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{name}{_labels([('bind', bind)])} {stats.get(key, 0)}" for bind, stats in pools)
+
+    providers = provider_stats()
+    for name, key in (("http_client_requests_total", "requests"), ("http_client_errors_total", "errors"),
+                      ("http_client_retries_total", "retries"), ("http_client_rejected_total", "rejected")):
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(f"{name}{_labels([('provider', p)])} {stats[key]}" for p, stats in providers.items())
+    lines.append("# TYPE http_client_circuit_open gauge")
+    lines.extend(
+        f"http_client_circuit_open{_labels([('provider', p)])} {int(stats['circuit'] != 'closed')}"
+        for p, stats in providers.items()
+    )
+    return lines
+
+
+def render_metrics() -> str:
+    lines = []
+    for histogram in (REQUEST_SECONDS, REQUEST_QUERIES, REQUEST_DB_SECONDS, DB_QUERY_SECONDS, OUTBOUND_SECONDS):
+        lines.extend(histogram.render())
+    lines.extend(gauges())
+    return "\n".join(lines) + "\n"
+
+
+def _is_loopback(address: Optional[str]) -> bool:
+    try:
+        return ipaddress.ip_address(address or "").is_loopback
+    except ValueError:
+        return False
+
+
+def init_metrics(app) -> None:
+    """Request timing middleware, SQL listeners, Server-Timing header and /metrics"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+    token = os.getenv("METRICS_TOKEN")
+    # The frontend is on another origin: without this browsers hide Server-Timing from it
+    timing_allow_origin = os.getenv("TIMING_ALLOW_ORIGIN", "*")
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_timings = RequestTimings()
+        g.metrics_token = _timings.set(g.metrics_timings)
+
+    @app.after_request
+    def observe_request(response):
+        start = g.pop("metrics_start", None)
+        timings = g.get("metrics_timings")
+        if start is None or timings is None:
+            return response
+
+        total = time.perf_counter() - start
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        if endpoint != "/metrics":
+            REQUEST_SECONDS.observe(total, request.method, endpoint, str(response.status_code))
+            db_seconds, db_count = timings.get("db")
+            REQUEST_QUERIES.observe(db_count, endpoint)
+            REQUEST_DB_SECONDS.observe(db_seconds, endpoint)
+        # Streamed bodies (AI search) are still running here; their LLM time lands in /metrics only
+        response.headers["Server-Timing"] = server_timing(timings, total)
+        if timing_allow_origin:
+            response.headers["Timing-Allow-Origin"] = timing_allow_origin
+        return response
+
+    @app.teardown_request
+    def stop_timer(_error=None):
+        reset = g.pop("metrics_token", None)
+        if reset is not None:
+            try:
+                _timings.reset(reset)
+            except ValueError:
+                _timings.set(None)  # torn down from another context (streamed responses)
+
+    def metrics():
+        # Pool and provider internals: never public
+        if token:
+            if request.headers.get("Authorization") != f"Bearer {token}":
+                return Response("Unauthorized\n", status=401, mimetype="text/plain")
+        elif not _is_loopback(request.remote_addr):
+            return Response("Not Found\n", status=404, mimetype="text/plain")
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+    app.add_url_rule("/metrics", "metrics", metrics)
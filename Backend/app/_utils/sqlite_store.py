@@ -0,0 +1,85 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from flask import current_app
+
+
+_TABLE_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class SqliteTTLStore:
+    """
+    Persistent key/value store (JSON values) with per-entry expiry, kept in a local
+    SQLite file so every worker process on the host shares it. One table per namespace.
+    """
+
+    def __init__(self, table: str, path: Optional[str] = None, ttl: Optional[float] = None):
+        if not _TABLE_NAME.match(table):
+            raise ValueError(f"Invalid table name '{table}'")
+        self.table = table
+        self.ttl = ttl
+        self._path = path
+        self._local = threading.local()
+
+    @property
+    def path(self) -> str:
+        if self._path is None:
+            self._path = os.getenv('CACHE_DB_PATH') or os.path.join(current_app.instance_path, 'cache.db')
+        return self._path
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread (and per process: connections must not cross a fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        # WAL lets readers in other workers carry on while one of them writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self._connection().execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return default
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return default
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), expires_at),
+        )
+
+    def delete(self, key: str) -> None:
+        self._connection().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        """Delete expired entries, returns how many were removed"""
+        cursor = self._connection().execute(
+            f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+        )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        self._connection().execute(f"DELETE FROM {self.table}")
@@ -1,39 +1,144 @@
+import json
 import os
+import threading
+import time
+
 from flask_sqlalchemy import SQLAlchemy
-from google.cloud.sql.connector import Connector, IPTypes
 import pymysql
 import sqlalchemy
-import json, os
-from google.oauth2 import service_account
+from sqlalchemy.pool import QueuePool
 
 db = SQLAlchemy()
 
+# Bind key of the optional read-only engine used by the weather/search queries
+READ_BIND = "read"
+
+
+
+# One explicitly sized pool per process. Size it so workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# stays under the database's connection limit, and watch /api/weather/test-db for waits.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 5))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 10))  # whole seconds (engine_from_config truncates)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 300))
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", min(2, DB_POOL_SIZE)))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that counts checkouts and how long callers waited for a free connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._stats = {"checkouts": 0, "waits": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0, "timeouts": 0}
+
+    def _do_get(self):
+        # At capacity: this checkout blocks until someone returns a connection (or times out)
+        saturated = self.checkedout() >= self.size() + max(self._max_overflow, 0)
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except sqlalchemy.exc.TimeoutError:
+            with self._stats_lock:
+                self._stats["timeouts"] += 1
+            raise
+        finally:
+            waited = (time.perf_counter() - start) * 1000
+            with self._stats_lock:
+                self._stats["checkouts"] += 1
+                if saturated:
+                    self._stats["waits"] += 1
+                    self._stats["wait_ms_total"] += waited
+                    self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], waited)
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep counting across it
+        pool = super().recreate()
+        pool._stats = self._stats
+        pool._stats_lock = self._stats_lock
+        return pool
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats.update(checkouts=0, waits=0, wait_ms_total=0.0, wait_ms_max=0.0, timeouts=0)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["wait_ms_total"] = round(stats["wait_ms_total"], 2)
+        stats["wait_ms_max"] = round(stats["wait_ms_max"], 2)
+        return stats
 
 
-def connect_with_connector() -> sqlalchemy.engine.base.Engine:
-    """Initializes a secure connection pool for Cloud SQL (MySQL)."""
+def pool_options() -> dict:
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
 
-    instance_connection_name = os.getenv("INSTANCE_CONNECTION_NAME")
+
+def pool_stats(engine) -> dict:
+    """Checked-out/idle/overflow counts plus checkout wait times for this process's pool"""
+    pool = engine.pool
+    stats = {
+        "pid": os.getpid(),
+        "size": pool.size(),
+        "max_overflow": getattr(pool, "_max_overflow", None),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "timeout_s": pool.timeout(),
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(pool.stats())
+    return stats
+
+
+def warm_pool(engine, count: int = DB_POOL_WARMUP) -> int:
+    """Open `count` connections up front and return them to the pool, so early requests don't pay for connecting"""
+    count = min(count, engine.pool.size())
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.connect())
+    except Exception as e:
+        print(f"⚠️  Pool warm-up stopped after {len(connections)} connections: {e}")
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
+def cloud_sql_creator(instance_connection_name: str = None):
+    """DBAPI connection factory for Cloud SQL (MySQL), used as the pool's creator"""
+
+    instance_connection_name = instance_connection_name or os.getenv("INSTANCE_CONNECTION_NAME")
     db_user = os.getenv("DB_USER")
     db_pass = os.getenv("DB_PASS")
     db_name = os.getenv("DB_NAME")
 
-    ip_type = IPTypes.PRIVATE if os.environ.get("PRIVATE_IP") else IPTypes.PUBLIC
+    # The Connector runs a background thread that doesn't survive fork(), so create it
+    # lazily in the process that actually connects (e.g. each gunicorn worker after preload)
+    connectors = {}
+    lock = threading.Lock()
 
-    if "GOOGLE_APPLICATION_CREDENTIALS" in os.environ and os.path.exists(os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", "")):
-        credentials = service_account.Credentials.from_service_account_file(
-            os.environ["GOOGLE_APPLICATION_CREDENTIALS"]
-        )
-    elif "SERVICE_ACCOUNT_JSON" in os.environ:
-        creds_info = json.loads(os.environ["SERVICE_ACCOUNT_JSON"])
-        credentials = service_account.Credentials.from_service_account_info(creds_info)
-    else:
-        credentials = None
-    
-    connector = Connector(ip_type=ip_type, credentials=credentials)
+    def get_connector():
+        from google.cloud.sql.connector import Connector, IPTypes
+
+        pid = os.getpid()
+        with lock:
+            if pid not in connectors:
+                connectors.clear()
+                ip_type = IPTypes.PRIVATE if os.environ.get("PRIVATE_IP") else IPTypes.PUBLIC
+                connectors[pid] = Connector(ip_type=ip_type, credentials=load_credentials())
+            return connectors[pid]
 
     def getconn() -> pymysql.connections.Connection:
-        conn: pymysql.connections.Connection = connector.connect(
+        conn: pymysql.connections.Connection = get_connector().connect(
             instance_connection_name,
             "pymysql",
             user=db_user,
@@ -42,13 +147,20 @@ def connect_with_connector() -> sqlalchemy.engine.base.Engine:
         )
         return conn
 
-    pool = sqlalchemy.create_engine(
-        "mysql+pymysql://",
-        creator=getconn,
-        pool_pre_ping=True,
-        pool_recycle=300,
-    )
-    return pool
+    return getconn
+
+
+def load_credentials():
+    from google.oauth2 import service_account
+
+    if "GOOGLE_APPLICATION_CREDENTIALS" in os.environ and os.path.exists(os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", "")):
+        return service_account.Credentials.from_service_account_file(
+            os.environ["GOOGLE_APPLICATION_CREDENTIALS"]
+        )
+    if "SERVICE_ACCOUNT_JSON" in os.environ:
+        creds_info = json.loads(os.environ["SERVICE_ACCOUNT_JSON"])
+        return service_account.Credentials.from_service_account_info(creds_info)
+    return None
 
 
 def init_db(app):
@@ -64,9 +176,9 @@ def init_db(app):
         print(f"   Instance: {instance_name}")
         print(f"   Database: {db_name}")
         
-        engine = connect_with_connector()
+        # Flask-SQLAlchemy's engine owns the only pool; the connector is started on first connect
         app.config["SQLALCHEMY_DATABASE_URI"] = "mysql+pymysql://"
-        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"creator": engine.raw_connection}
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"creator": cloud_sql_creator(), **pool_options()}
     else:
         db_path = app.config.get("DATABASE_PATH", "./instance/weather_app.db")
         if not os.path.isabs(db_path):
@@ -76,6 +188,11 @@ def init_db(app):
         print(f"   Path: {db_path}")
         
         app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = pool_options()
+
+    read_bind = read_bind_options(app)
+    if read_bind is not None:
+        app.config["SQLALCHEMY_BINDS"] = {READ_BIND: read_bind}
     
     print("="*60 + "\n")
 
@@ -83,4 +200,53 @@ def init_db(app):
     db.init_app(app)
 
     with app.app_context():
+        # Only the default (primary) bind has models, nothing is created on the read engine
         db.create_all()
+        warmed = sum(warm_pool(engine) for engine in db.engines.values())
+    print(f"🔌 Pool: {DB_POOL_SIZE} + {DB_MAX_OVERFLOW} overflow connections per engine, {warmed} warmed up")
+
+
+def read_bind_options(app):
+    """
+    Engine options for the read bind, or None to read from the primary:
+    - DB_READ_URL: any SQLAlchemy URL (e.g. a MySQL read replica)
+    - READ_INSTANCE_CONNECTION_NAME: a Cloud SQL read replica (same DB_USER/DB_PASS/DB_NAME)
+    - FLASK_READ_DATABASE_PATH: a local SQLite copy, opened read-only
+    """
+    read_url = os.getenv("DB_READ_URL")
+    read_instance = os.getenv("READ_INSTANCE_CONNECTION_NAME")
+    read_path = app.config.get("READ_DATABASE_PATH")
+
+    if read_url:
+        print(f"📖 Reads: {sqlalchemy.engine.make_url(read_url).render_as_string(hide_password=True)}")
+        return {"url": read_url, **pool_options()}
+    if read_instance:
+        print(f"📖 Reads: Cloud SQL replica {read_instance}")
+        return {"url": "mysql+pymysql://", "creator": cloud_sql_creator(read_instance), **pool_options()}
+    if read_path:
+        read_path = os.path.abspath(read_path)
+        print(f"📖 Reads: local SQLite {read_path} (read-only)")
+        return {"url": f"sqlite:///file:{read_path}?mode=ro&uri=true", **pool_options()}
+    return None
+
+
+def read_engine():
+    """Engine for read-only weather/search queries: the read bind if configured, else the primary"""
+    return db.engines.get(READ_BIND, db.engine)
+
+
+def close_pool(app):
+    """Close every pooled connection (the gunicorn master does this before forking workers)"""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def dispose_after_fork(app):
+    """Drop pooled connections inherited from a preloading parent and warm up this worker's own"""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+            if isinstance(engine.pool, InstrumentedQueuePool):
+                engine.pool.reset_stats()  # counts inherited from the master aren't this worker's
+            warm_pool(engine)
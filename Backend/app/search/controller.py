@@ -1,7 +1,7 @@
 from flask import request, Response, stream_with_context
 from flask_restx import Resource, Namespace
 
-from app.search.service import SearchService
+from app.search.service import SearchService, StreamEvent
 
 api = Namespace('search')
 search_service = SearchService()
@@ -41,7 +41,12 @@ class SearchAiApi(Resource):
             """Generator function for SSE streaming"""
             try:
                 for chunk in search_service.ai_search_stream(query):
-                    yield f"data: {chunk}\n\n"
+                    if isinstance(chunk, StreamEvent):
+                        # SSE comment: flushes headers early and keeps proxies from timing out,
+                        # clients ignore it
+                        yield f": {chunk}\n\n"
+                    else:
+                        yield f"data: {chunk}\n\n"
                 yield "data: [DONE]\n\n"
             except Exception as e:
                 yield f"data: Error: {str(e)}\n\n"
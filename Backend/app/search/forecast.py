@@ -0,0 +1,82 @@
+"""
+Forecast cache for the live weather tool.
+
+Forecasts are keyed by a lat/lon grid cell (FORECAST_GRID_DEG, ~11 km at 0.1°, about
+the resolution of the models behind Open-Meteo), timezone and the current UTC hour,
+and fetched for the cell centre so everyone in a cell shares one answer. Entries live
+in memory and in the shared SQLite store for FORECAST_CACHE_TTL (Open-Meteo refreshes
+hourly), and concurrent misses for the same cell wait on a single upstream request.
+"""
+import math
+import sqlite3
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from app._utils.cache import TTLCache
+from app._utils.singleflight import SingleFlight
+from app._utils.sqlite_store import SqliteTTLStore
+
+
+class ForecastCache:
+    """Grid-cell/hour forecast cache with request coalescing in front of `fetch(lat, lon, tz)`"""
+
+    def __init__(
+        self,
+        fetch: Callable[[float, float, str], dict],
+        store: Optional[SqliteTTLStore] = None,
+        grid: float = 0.1,
+        ttl: float = 3600,
+        memory_size: int = 256,
+    ):
+        self.fetch = fetch
+        self.store = store
+        self.grid = grid
+        self.ttl = ttl
+        self._memory = TTLCache(maxsize=memory_size, ttl=ttl)
+        self._inflight = SingleFlight()
+
+    def cell(self, lat: float, lon: float):
+        """Centre of the grid cell containing (lat, lon)"""
+        def snap(value):
+            return round((math.floor(value / self.grid) + 0.5) * self.grid, 4)
+        return snap(lat), snap(lon)
+
+    def get(self, lat: float, lon: float, tz: str) -> dict:
+        cell_lat, cell_lon = self.cell(lat, lon)
+        hour = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H')
+        key = f"{cell_lat},{cell_lon},{tz},{hour}"
+
+        data = self._memory.get(key)
+        if data is not None:
+            return data
+
+        def load():
+            # Another worker (or the previous leader) may have stored it meanwhile
+            data = self._from_store(key)
+            if data is None:
+                data = self.fetch(cell_lat, cell_lon, tz)
+                self._to_store(key, data)
+            self._memory.set(key, data)
+            return data
+
+        return self._inflight.do(key, load)
+
+    def _from_store(self, key: str) -> Optional[dict]:
+        if self.store is None:
+            return None
+        try:
+            return self.store.get(key)
+        except sqlite3.Error as e:
+            print(f"⚠️  Forecast cache read failed: {e}")
+            return None
+
+    def _to_store(self, key: str, data: dict) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.set(key, data, ttl=self.ttl)
+        except sqlite3.Error as e:
+            print(f"⚠️  Forecast cache write failed: {e}")
+
+    def stats(self) -> dict:
+        return self._memory.stats()
@@ -0,0 +1,154 @@
+"""
+Cached place-name geocoding for the AI search tools.
+
+Lookups go memory LRU -> local `stations` catalog -> on-disk SQLite cache (shared by
+all workers) -> upstream geocoder, so repeat and Australian-station queries never
+touch the network. Upstream calls are spaced out to respect Nominatim's ~1 req/s
+usage policy (per worker process): callers reserve the next free slot and wait for it
+outside the lock, so one slow lookup doesn't hold up everyone queued behind it.
+"""
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+from app._utils.cache import TTLCache
+from app._utils.sqlite_store import SqliteTTLStore
+from app.search.index import normalize
+
+
+_NOT_FOUND = {'result': None}  # cached "no such place", so misses aren't retried upstream
+
+
+class Geocoder:
+    """Multi-tier geocode cache in front of an upstream `fetch(name) -> dict | None`"""
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Optional[dict]],
+        store: Optional[SqliteTTLStore] = None,
+        catalog: Optional[Callable[[], object]] = None,
+        memory_size: int = 512,
+        ttl: float = 30 * 24 * 3600,
+        miss_ttl: float = 24 * 3600,
+        min_interval: float = 1.0,
+    ):
+        self.fetch = fetch
+        self.store = store
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.min_interval = min_interval
+        # Returns the StationSearchIndex over `stations` (None: no local resolution)
+        self.catalog = catalog
+        self._memory = TTLCache(maxsize=memory_size, ttl=ttl)
+        self._throttle_lock = threading.Lock()
+        self._next_fetch = 0.0
+
+    def geocode(self, name: str) -> Optional[dict]:
+        """{lat, lon, display_name, source} for a place name, or None if it can't be found"""
+        key = normalize(name)
+        if not key:
+            return None
+
+        cached = self._memory.get(key)
+        if cached is not None:
+            return cached['result']
+
+        result = self._from_catalog(key)
+        if result is not None:
+            self._memory.set(key, {'result': result})
+            return result
+
+        cached = self._from_store(key)
+        if cached is not None:
+            self._memory.set(key, cached, ttl=self.ttl if cached['result'] else self.miss_ttl)
+            return cached['result']
+
+        result = self._fetch(name)
+        entry = {'result': result} if result else _NOT_FOUND
+        ttl = self.ttl if result else self.miss_ttl
+        self._memory.set(key, entry, ttl=ttl)
+        if self.store is not None:
+            try:
+                self.store.set(key, entry, ttl=ttl)
+            except sqlite3.Error as e:
+                print(f"⚠️  Geocode cache write failed: {e}")
+        return result
+
+    def _from_catalog(self, key: str) -> Optional[dict]:
+        """Resolve from the station list, for bare names or ones qualified with an Australian state"""
+        if self.catalog is None:
+            return None
+
+        try:
+            index = self.catalog()
+            place, state = key, None
+            station = index.resolve_place(place)
+            # "MELBOURNE VIC" / "MELBOURNE VICTORIA AUSTRALIA": retry without trailing state/country
+            while station is None:
+                place, qualifier = _strip_qualifier(place)
+                if qualifier is None:
+                    break
+                state = state or _STATES.get(qualifier)
+                station = index.resolve_place(place)
+        except Exception as e:
+            print(f"⚠️  Station catalog unavailable for geocoding: {e}")
+            return None
+
+        if station is None or station.get('lat') is None or station.get('lon') is None:
+            return None
+        if state and station.get('state') != state:
+            return None  # e.g. "PERTH TAS" must not resolve to Perth Airport, WA
+        return {
+            'lat': float(station['lat']),
+            'lon': float(station['lon']),
+            'display_name': f"{station['Station Name']}, {station['state']}, Australia",
+            'source': 'stations',
+        }
+
+    def _from_store(self, key: str) -> Optional[dict]:
+        if self.store is None:
+            return None
+        try:
+            return self.store.get(key)
+        except sqlite3.Error as e:
+            print(f"⚠️  Geocode cache read failed: {e}")
+            return None
+
+    def _fetch(self, name: str) -> Optional[dict]:
+        # Keep upstream calls at least min_interval apart: only the slot reservation is locked
+        with self._throttle_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_fetch)
+            self._next_fetch = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+        result = self.fetch(name)
+        if result:
+            result = dict(result, source='nominatim')
+        return result
+
+    def stats(self) -> dict:
+        return self._memory.stats()
+
+
+_STATES = {
+    'VIC': 'VIC', 'VICTORIA': 'VIC',
+    'NSW': 'NSW', 'NEW SOUTH WALES': 'NSW',
+    'QLD': 'QLD', 'QUEENSLAND': 'QLD',
+    'WA': 'WA', 'WESTERN AUSTRALIA': 'WA',
+    'SA': 'SA', 'SOUTH AUSTRALIA': 'SA',
+    'TAS': 'TAS', 'TASMANIA': 'TAS',
+    'NT': 'NT', 'NORTHERN TERRITORY': 'NT',
+    'ACT': 'ACT', 'AUSTRALIAN CAPITAL TERRITORY': 'ACT',
+}
+# Longest first, so "WESTERN AUSTRALIA" is stripped whole rather than as "AUSTRALIA"
+_QUALIFIERS = sorted(list(_STATES) + ['AUSTRALIA', 'AU'], key=len, reverse=True)
+
+
+def _strip_qualifier(place: str):
+    """Split a trailing state/country off a normalized place name -> (place, qualifier or None)"""
+    for qualifier in _QUALIFIERS:
+        if place.endswith(' ' + qualifier):
+            return place[:-len(qualifier) - 1], qualifier
+    return place, None
@@ -0,0 +1,218 @@
+"""
+In-process typeahead index over the station catalog.
+
+Replaces `LIKE '%q%'` scans with two structures built once from `stations`:
+- a prefix trie over each station's full name and each word in it, and
+- trigram postings, used for substring matches and typo-tolerant fuzzy matches.
+
+Results are ranked by match quality: exact name, name prefix, word prefixes,
+substring, then fuzzy (trigram similarity), ties broken alphabetically.
+"""
+import heapq
+import re
+from decimal import Decimal
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import text as sqlalchemy_text
+
+from app._utils.cache import TTLCache
+
+
+EXACT, NAME_PREFIX, WORD_PREFIX, SUBSTRING = 100, 90, 80, 70
+FUZZY_MAX = 60
+FUZZY_MIN_SIMILARITY = 0.45
+FUZZY_FILL = 5  # typo matching only kicks in below this many strict matches
+RESULT_CACHE_SIZE = 1024
+
+_NON_ALNUM = re.compile(r'[^A-Z0-9]+')
+
+
+def normalize(text: str) -> str:
+    """Uppercase, punctuation to spaces, collapse whitespace"""
+    return _NON_ALNUM.sub(' ', (text or '').upper()).strip()
+
+
+def trigrams(word: str) -> Set[str]:
+    """Padded trigrams of a single word, so short words and word edges still count"""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    """Dice coefficient of two words' trigram sets (1.0 = identical)"""
+    ta, tb = trigrams(a), trigrams(b)
+    return 2 * len(ta & tb) / (len(ta) + len(tb))
+
+
+class _TrieNode:
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: Set[int] = set()
+
+
+class StationSearchIndex:
+    """Prefix trie + trigram postings over station names"""
+
+    def __init__(self, stations: List[dict]):
+        self.stations: List[dict] = []
+        self.names: List[str] = []
+        self.words: List[List[str]] = []
+        self.word_grams: List[List[Set[str]]] = []
+        self._name_trie = _TrieNode()
+        self._word_trie = _TrieNode()
+        self._postings: Dict[str, Set[int]] = {}
+        # Typeahead repeats the same prefixes constantly, keep recent answers
+        self._results = TTLCache(maxsize=RESULT_CACHE_SIZE)
+
+        for station in stations:
+            name = normalize(station.get('Station Name'))
+            if not name:
+                continue
+            station_id = len(self.stations)
+            self.stations.append(station)
+            self.names.append(name)
+            self.words.append(name.split())
+            self.word_grams.append([trigrams(word) for word in self.words[-1]])
+
+            self._insert(self._name_trie, name, station_id)
+            for word in self.words[-1]:
+                self._insert(self._word_trie, word, station_id)
+                for gram in trigrams(word):
+                    self._postings.setdefault(gram, set()).add(station_id)
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+    @classmethod
+    def from_engine(cls, engine) -> "StationSearchIndex":
+        """Build the index from the `stations` table"""
+        with engine.connect() as conn:
+            result = conn.execute(sqlalchemy_text(
+                "SELECT `Station Name`, state, lat, lon FROM stations"
+            ))
+            rows = result.mappings().all()
+
+        return cls([
+            {k: float(v) if isinstance(v, Decimal) else v for k, v in row.items()}
+            for row in rows
+        ])
+
+    @staticmethod
+    def _insert(root: _TrieNode, key: str, station_id: int) -> None:
+        node = root
+        node.ids.add(station_id)
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            node.ids.add(station_id)
+
+    @staticmethod
+    def _prefixed(root: _TrieNode, prefix: str) -> Set[int]:
+        node = root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.ids
+
+    def _substring_candidates(self, query: str) -> Set[int]:
+        """Stations that could contain `query`: intersect postings of its inner trigrams"""
+        grams = [query[i:i + 3] for i in range(len(query) - 2) if ' ' not in query[i:i + 3]]
+        if not grams:
+            # Too short for trigrams, fall back to checking every name
+            return set(range(len(self.stations)))
+        postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+        return set.intersection(*postings)
+
+    def _fuzzy_score(self, query_words: List[str], query_grams: List[Set[str]], station_id: int) -> float:
+        """
+        Typo-tolerant similarity: each query word is scored against its best name word
+        (1.0 for a prefix, else trigram Dice). Every word must clear the minimum,
+        the score is their average.
+        """
+        total = 0.0
+        for qw, qg in zip(query_words, query_grams):
+            best = 0.0
+            for word, grams in zip(self.words[station_id], self.word_grams[station_id]):
+                if word.startswith(qw):
+                    best = 1.0
+                    break
+                best = max(best, 2 * len(qg & grams) / (len(qg) + len(grams)))
+            if best < FUZZY_MIN_SIMILARITY:
+                return 0.0
+            total += best
+        return total / len(query_words)
+
+    def resolve_place(self, place: str) -> Optional[dict]:
+        """
+        Station standing in for a place name: the name itself, or a name that starts with it
+        as whole words ("MELBOURNE" -> "MELBOURNE (OLYMPIC PARK)"). Bureau naming puts the
+        city-centre site in brackets, so those win over airports etc., then shorter names.
+        """
+        place = normalize(place)
+        if not place:
+            return None
+
+        candidates = [
+            station_id for station_id in self._prefixed(self._name_trie, place)
+            if self.names[station_id] == place or self.names[station_id].startswith(place + ' ')
+        ]
+        if not candidates:
+            return None
+
+        def rank(station_id):
+            raw = self.stations[station_id].get('Station Name', '').upper()
+            bracketed = raw[len(place):].lstrip().startswith('(')
+            return (self.names[station_id] != place, not bracketed, len(self.names[station_id]), self.names[station_id])
+
+        return self.stations[min(candidates, key=rank)]
+
+    def search(self, query: str, limit: int = 50) -> List[dict]:
+        """Ranked stations matching `query` (exact/prefix/substring first, then typos)"""
+        query = normalize(query)
+        if not query:
+            return []
+
+        cache_key = (query, limit)
+        cached = self._results.get(cache_key)
+        if cached is not None:
+            return cached
+
+        query_words = query.split()
+        scores: Dict[int, float] = {}
+
+        # Prefix matches straight from the tries
+        for station_id in self._prefixed(self._name_trie, query):
+            scores[station_id] = EXACT if self.names[station_id] == query else NAME_PREFIX
+        word_sets = sorted((self._prefixed(self._word_trie, qw) for qw in query_words), key=len)
+        for station_id in set.intersection(*word_sets):
+            scores.setdefault(station_id, WORD_PREFIX)
+
+        # Substring matches (the old LIKE '%q%' semantics), verified against the name
+        if len(scores) < limit:
+            for station_id in self._substring_candidates(query):
+                if station_id not in scores and query in self.names[station_id]:
+                    scores[station_id] = SUBSTRING
+
+        # Typo tolerance, only when exact-ish matching found (almost) nothing
+        if len(scores) < FUZZY_FILL:
+            query_grams = [trigrams(qw) for qw in query_words]
+            shared: Dict[int, int] = {}
+            for grams in query_grams:
+                for gram in grams:
+                    for station_id in self._postings.get(gram, ()):
+                        shared[station_id] = shared.get(station_id, 0) + 1
+
+            needed = sum(len(g) for g in query_grams) * FUZZY_MIN_SIMILARITY / 2
+            for station_id, count in shared.items():
+                if station_id in scores or count < needed:
+                    continue
+                fuzzy = self._fuzzy_score(query_words, query_grams, station_id)
+                if fuzzy:
+                    scores[station_id] = FUZZY_MAX * fuzzy
+
+        ranked = heapq.nsmallest(limit, scores, key=lambda i: (-scores[i], self.names[i]))
+        results = [self.stations[i] for i in ranked]
+        self._results.set(cache_key, results)
+        return results
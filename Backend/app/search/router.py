@@ -0,0 +1,107 @@
+"""
+Local intent router for AI search.
+
+Recognizes the common query shapes ("weather in Melbourne today", "Hobart forecast",
+"average rainfall at Sydney in 2019") with keyword rules and the station catalog,
+so the tool can run straight away instead of asking the model which tool to call.
+Anything it isn't sure about returns None and goes through the model as before: live
+weather is only routed when the place is a station the catalog knows, and questions
+about a month or season ("Is Darwin hot in December?") are climate questions, not live ones.
+"""
+import re
+from typing import Callable, Optional
+
+from app.search.index import normalize
+
+
+LIVE_WORDS = {
+    'WEATHER', 'FORECAST', 'TEMPERATURE', 'TEMP', 'RAIN', 'RAINING', 'RAINY', 'SHOWERS', 'WIND', 'WINDY',
+    'HUMID', 'HUMIDITY', 'SUNNY', 'HOT', 'COLD', 'WARM', 'UMBRELLA', 'STORM', 'STORMS', 'DEGREES',
+}
+HISTORY_WORDS = {
+    'AVERAGE', 'AVERAGES', 'HISTORICAL', 'HISTORY', 'HISTORICALLY', 'TYPICAL', 'TYPICALLY', 'USUALLY',
+    'NORMALLY', 'CLIMATE', 'RECORD', 'RECORDS', 'PAST', 'TREND', 'TRENDS', 'MONTHLY', 'ANNUAL', 'YEARLY',
+}
+SEASON_WORDS = {
+    'JANUARY', 'FEBRUARY', 'MARCH', 'APRIL', 'MAY', 'JUNE', 'JULY', 'AUGUST', 'SEPTEMBER', 'OCTOBER',
+    'NOVEMBER', 'DECEMBER', 'SUMMER', 'AUTUMN', 'FALL', 'WINTER', 'SPRING',
+}
+# Words that end a place name ("Sydney in 2019", "Hobart this weekend", "Sydney when it is cold")
+PLACE_BREAKS = {
+    'IN', 'AT', 'FOR', 'NEAR', 'AROUND', 'ON', 'DURING', 'BETWEEN', 'FROM', 'THIS', 'NEXT', 'LAST',
+    'TODAY', 'TONIGHT', 'TOMORROW', 'NOW', 'RIGHT', 'CURRENTLY', 'LIKE', 'BE', 'IS', 'GOING', 'AND', 'OR',
+    'DAY', 'DAYS', 'WEEK', 'WEEKEND', 'MONTH', 'MONTHS', 'YEAR', 'YEARS', 'MORNING', 'AFTERNOON', 'EVENING', 'NIGHT',
+    'WHEN', 'IF', 'WHAT', 'WHERE', 'HOW',
+} | LIVE_WORDS | HISTORY_WORDS | SEASON_WORDS
+FILLER_WORDS = {
+    'WHAT', 'WHATS', 'S', 'HOW', 'HOWS', 'IS', 'THE', 'A', 'AN', 'OF', 'IT', 'WILL', 'DOES', 'DO', 'SHOULD', 'I',
+    'BRING', 'GOING', 'TO', 'BE', 'ME', 'TELL', 'SHOW', 'GIVE', 'PLEASE', 'CURRENT', 'LIVE', 'LATEST',
+} | PLACE_BREAKS
+PREPOSITIONS = ('IN', 'AT', 'FOR', 'NEAR', 'AROUND')
+MAX_PLACE_WORDS = 5
+
+_YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+
+
+class IntentRouter:
+    """Keyword + station-catalog router: {'intent', 'location', 'station', 'years'} or None"""
+
+    def __init__(self, catalog: Callable[[], object]):
+        self.catalog = catalog  # returns the StationSearchIndex
+
+    def route(self, query: str) -> Optional[dict]:
+        words = normalize(query).split()
+        if not words:
+            return None
+
+        years = sorted({int(y) for y in _YEAR.findall(query)})
+        history = bool(HISTORY_WORDS.intersection(words)) or (bool(years) and bool(LIVE_WORDS.intersection(words)))
+        live = bool(LIVE_WORDS.intersection(words))
+        if not history and not live:
+            return None
+
+        location, station = self._find_place(words)
+        if history:
+            # Historical answers come from our own station data only
+            if station is None:
+                return None
+            return {'intent': 'history', 'location': location, 'station': station, 'years': years}
+        if station is None or SEASON_WORDS.intersection(words):
+            # Unknown place, or "hot in December": let the model decide
+            return None
+        return {'intent': 'live', 'location': location, 'station': station, 'years': []}
+
+    def _find_place(self, words: list):
+        """(place, station or None) from "... in/at/for <place>", else a bare station name in the query"""
+        try:
+            index = self.catalog()
+        except Exception as e:
+            print(f"⚠️  Station catalog unavailable for routing: {e}")
+            index = None
+
+        for i, word in enumerate(words):
+            if word not in PREPOSITIONS:
+                continue
+            place = []
+            for candidate in words[i + 1:]:
+                if candidate in PLACE_BREAKS or candidate.isdigit():
+                    break
+                place.append(candidate)
+            while place and place[0] in FILLER_WORDS:
+                place.pop(0)
+            if place and len(place) <= MAX_PLACE_WORDS:
+                name = ' '.join(place)
+                return name.title(), index.resolve_place(name) if index is not None else None
+
+        # No preposition ("Hobart forecast"): only trust names the catalog knows
+        if index is None:
+            return None, None
+        rest = [w for w in words if w not in FILLER_WORDS and w not in LIVE_WORDS
+                and w not in HISTORY_WORDS and not w.isdigit()]
+        for size in range(min(len(rest), MAX_PLACE_WORDS), 0, -1):
+            for start in range(len(rest) - size + 1):
+                name = ' '.join(rest[start:start + size])
+                station = index.resolve_place(name)
+                if station is not None:
+                    return name.title(), station
+        return None, None
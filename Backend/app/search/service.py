@@ -1,46 +1,116 @@
+import contextvars
 import os
 import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from typing import List, Generator
-from decimal import Decimal
 
-from sqlalchemy import text as sqlalchemy_text
-from app.database import db
+from flask import current_app
+
+from app._utils.http_client import call_deadline
+from app._utils.metrics import timed
+from app.database import read_engine
+from app.search.index import StationSearchIndex
 from app.search.prompt import SYSTEM_PROMPT
-from app.search.tools import geocode_location, fetch_open_meteo
+from app.search.router import IntentRouter
+from app.search.tools import create_geocoder, get_live_weather
+from app.weather.service import weather_service
+from app.weather.spatial import LazyStationIndex
+
+
+LLM_TIMEOUT = float(os.getenv("AI_LLM_TIMEOUT", 30))
+TOOL_TIMEOUT = float(os.getenv("AI_TOOL_TIMEOUT", 10))  # per tool call, they all run at once
+KEEPALIVE_INTERVAL = 5.0
+LOCAL_ROUTER = os.getenv("AI_LOCAL_ROUTER", "true").lower() == "true"
+
+# Shared by every request, one pool each so slow model calls can't starve tool calls (or the
+# reverse). A timed-out call still occupies its thread until it returns, so both kinds of call
+# carry their own timeout (OpenAI client timeout, call_deadline for provider HTTP calls)
+_tool_executor = ThreadPoolExecutor(max_workers=int(os.getenv("AI_TOOL_WORKERS", 8)), thread_name_prefix="ai-tool")
+_llm_executor = ThreadPoolExecutor(max_workers=int(os.getenv("AI_LLM_WORKERS", 4)), thread_name_prefix="ai-llm")
+
+
+class StreamEvent(str):
+    """Out-of-band stream item (status / keep-alive) rather than answer text"""
+
+
+KEEPALIVE = StreamEvent("keep-alive")
+
+# Tool definitions for the AI model
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "get_live_weather",
+            "description": "Get current weather and hourly forecast for a location name using online sources.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "location": {"type": "string", "description": "City or place name, e.g. 'Melbourne'"},
+                },
+                "required": ["location"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_station_history",
+            "description": "Get historical monthly averages (rainfall, temperature, humidity, wind) recorded at an Australian weather station.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "station": {"type": "string", "description": "Station or town name, e.g. 'Sydney'"},
+                    "years": {"type": "array", "items": {"type": "integer"}, "description": "Years to return; omit for long-term monthly normals"},
+                },
+                "required": ["station"],
+            },
+        },
+    },
+]
+
+
+def routed_tool_call(route: dict) -> tuple:
+    """(id, name, arguments) tool call for a locally routed query"""
+    if route["intent"] == "history":
+        args = {"station": route["station"]["Station Name"], "years": route["years"]}
+        return "local-history", "get_station_history", json.dumps(args)
+    return "local-live", "get_live_weather", json.dumps({"location": route["location"]})
+
+
+def _round(value):
+    return round(value, 2) if isinstance(value, float) else value
+
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return round(sum(values) / len(values), 2) if values else None
 
 
 class SearchService:
     """Search service layer for business logic"""
     
-    def search_stations(self, query: str) -> List[dict]:
+    def __init__(self):
+        self.station_index = LazyStationIndex(lambda: StationSearchIndex.from_engine(read_engine()))
+        # Place names that match a station resolve locally, without a Nominatim call
+        self.geocoder = create_geocoder(catalog=self.station_index.get)
+        self.router = IntentRouter(self.station_index.get)
+
+    def load_search_index(self) -> int:
+        """Build (or rebuild) the in-memory station search index, returns station count"""
+        self.station_index.reset()
+        return len(self.station_index.get())
+
+    def search_stations(self, query: str, limit: int = 50) -> List[dict]:
         """
         Search for weather stations by name
-        Returns a list of station objects with name, state, lat, lon
+        Returns a list of station objects with name, state, lat, lon,
+        ranked by match quality (exact, prefix, substring, then typo-tolerant matches)
         """
         if not query:
             return []
         
-        sql_query = """
-            SELECT DISTINCT
-                `Station Name`,
-                state,
-                lat,
-                lon
-            FROM
-                stations
-            WHERE
-                `Station Name` LIKE :query
-            ORDER BY
-                `Station Name` ASC
-            LIMIT 50
-        """
-        
-        with db.engine.connect() as conn:
-            result = conn.execute(
-                sqlalchemy_text(sql_query), 
-                {"query": f"%{query}%"}
-            )
-            rows = result.mappings().all()
+        rows = self.station_index.get().search(query, limit=limit)
         
         # Format as list of dictionaries with station info
         formatted_results = [
@@ -56,11 +126,84 @@ class SearchService:
         
         return formatted_results
     
+    def _submit(self, executor: ThreadPoolExecutor, timeout: float, fn, *args, **kwargs) -> Future:
+        """Run fn(*args, **kwargs) on a shared pool inside this request's app context, its HTTP calls bounded by timeout"""
+        app = current_app._get_current_object()
+        context = contextvars.copy_context()  # request timings follow the work onto the pool
+        deadline = time.monotonic() + timeout  # time spent queued for a thread counts too
+
+        def run():
+            with app.app_context(), call_deadline(deadline - time.monotonic()):
+                return fn(*args, **kwargs)
+
+        return executor.submit(context.run, run)
+
+    @staticmethod
+    def _timed_llm_call(client, **kwargs):
+        with timed("llm", kwargs.get("model", "unknown")):
+            return client.chat.completions.create(**kwargs)
+
+    @staticmethod
+    def _await(futures, timeout: float) -> Generator[StreamEvent, None, None]:
+        """Wait up to `timeout` seconds for futures, yielding a keep-alive every KEEPALIVE_INTERVAL"""
+        deadline = time.monotonic() + timeout
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            _, pending = wait(pending, timeout=min(KEEPALIVE_INTERVAL, remaining))
+            if pending:
+                yield KEEPALIVE
+
+    def _run_tool(self, name: str, arguments: str, query: str) -> dict:
+        args = json.loads(arguments or "{}")
+        if name == "get_live_weather":
+            return get_live_weather(args.get("location") or query, self.geocoder)
+        if name == "get_station_history":
+            return self.station_history(args.get("station") or query, args.get("years") or [])
+        return {"error": f"Unknown tool '{name}'."}
+
+    def station_history(self, station: str, years: List[int]) -> dict:
+        """get_station_history tool: monthly averages for the given years, else per-month normals"""
+        match = self.station_index.get().resolve_place(station)
+        station_name = match["Station Name"] if match else station
+        rows = weather_service.get_avg_weather_by_station(station_name)
+        if not rows:
+            return {"error": f"No historical data for '{station}'."}
+
+        fields = [key for key in rows[0] if key.startswith("Avg_")]
+        if years:
+            months = [row for row in rows if int(row["Date"][:4]) in years]
+            return {
+                "station": rows[0]["Station Name"],
+                "years": years,
+                "monthly_averages": [
+                    {"month": row["Date"][:7], **{f: _round(row[f]) for f in fields}} for row in months
+                ],
+            }
+
+        # Climate normals: each calendar month averaged over all years, plus the last 12 months
+        normals = []
+        for month in range(1, 13):
+            in_month = [row for row in rows if int(row["Date"][5:7]) == month]
+            if in_month:
+                normals.append({"month": month, **{f: _mean(row[f] for row in in_month) for f in fields}})
+        return {
+            "station": rows[0]["Station Name"],
+            "period": [rows[0]["Date"][:7], rows[-1]["Date"][:7]],
+            "monthly_normals": normals,
+            "last_12_months": [
+                {"month": row["Date"][:7], **{f: _round(row[f]) for f in fields}} for row in rows[-12:]
+            ],
+        }
+
     def ai_search_stream(self, query: str) -> Generator[str, None, None]:
         """
         Two-stage tool calling:
-        1) non-stream call to decide tool(s)
-        2) call tool(s) in Python, then stream final answer with tool results
+        1) pick tool(s): locally for obvious live/historical questions, else a non-stream model call
+        2) run all tool calls concurrently (each with a timeout), then stream final answer with tool results
+        StreamEvent items are status/keep-alive events for the client, not answer text.
         """
         try:
             from openai import OpenAI
@@ -70,97 +213,98 @@ class SearchService:
                 yield "Error: OPENAI_API_KEY not set in environment variables"
                 return
 
-            client = OpenAI(api_key=api_key)
-
-            # Tool definitions for the AI model
-            tools = [
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_live_weather",
-                        "description": "Get current weather and hourly forecast for a location name using online sources.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "location": {"type": "string", "description": "City or place name, e.g. 'Melbourne'"},
-                            },
-                            "required": ["location"],
-                        },
-                    },
-                },
-            ]
+            # Open the stream right away, the upstream calls below take seconds
+            yield StreamEvent("status: thinking")
 
-            # First API call: determine if tools are needed
-            first = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": query},
-                ],
-                tools=tools,
-                tool_choice="auto",
-                temperature=0.3,
-                stream=False,
-            )
+            # No SDK retries: a retried call could outlive LLM_TIMEOUT and keep holding its pool thread
+            client = OpenAI(api_key=api_key, timeout=LLM_TIMEOUT, max_retries=0)
 
             msgs = [
                 {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": query},
             ]
 
-            # If tools are needed, execute them on the backend
-            if first.choices[0].finish_reason == "tool_calls":
-                for tool_call in first.choices[0].message.tool_calls:
-                    if tool_call.function.name == "get_live_weather":
-                        args = json.loads(tool_call.function.arguments or "{}")
-                        location = args.get("location") or query
-                        
-                        # Geocode location
-                        geo = geocode_location(location)
-                        if not geo:
-                            tool_result = {"error": f"Cannot geocode '{location}'."}
-                        else:
-                            # Fetch weather data
-                            data = fetch_open_meteo(geo["lat"], geo["lon"])
-                            tool_result = {
-                                "location_input": location,
-                                "resolved_location": geo,
-                                "provider": "open-meteo",
-                                "data": data,
-                            }
-
-                        # Append tool results back to messages
-                        msgs.append({
-                            "role": "assistant",
-                            "tool_calls": [{
-                                "id": tool_call.id,
-                                "type": "function",
-                                "function": {"name": "get_live_weather", "arguments": json.dumps(args)}
-                            }]
-                        })
-                        msgs.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": json.dumps(tool_result),
-                        })
+            route = self.router.route(query) if LOCAL_ROUTER else None
+            if route is not None:
+                # "weather in <place>" / "<station> averages": no need to ask the model which tool
+                calls = [routed_tool_call(route)]
             else:
-                # If no tools needed, use the first response directly
-                if first.choices[0].message.content:
-                    msgs.append({"role": "assistant", "content": first.choices[0].message.content})
+                # First API call: determine if tools are needed (keep-alives while it runs)
+                first_future = self._submit(
+                    _llm_executor,
+                    LLM_TIMEOUT,
+                    self._timed_llm_call,
+                    client,
+                    model="gpt-4o-mini",
+                    messages=msgs,
+                    tools=TOOLS,
+                    tool_choice="auto",
+                    temperature=0.3,
+                    stream=False,
+                )
+                yield from self._await([first_future], LLM_TIMEOUT)
+                if not first_future.done():
+                    yield f"Error: AI service did not respond within {LLM_TIMEOUT:g}s"
+                    return
+                choice = first_future.result().choices[0]
+
+                calls = []
+                if choice.finish_reason == "tool_calls":
+                    calls = [
+                        (tool_call.id, tool_call.function.name, tool_call.function.arguments)
+                        for tool_call in choice.message.tool_calls
+                    ]
+                elif choice.message.content:
+                    # If no tools needed, use the first response directly
+                    msgs.append({"role": "assistant", "content": choice.message.content})
+
+            # If tools are needed, execute them on the backend, all at once
+            if calls:
+                yield StreamEvent(f"status: running {len(calls)} tool call(s)")
+
+                futures = [
+                    self._submit(_tool_executor, TOOL_TIMEOUT, self._run_tool, name, arguments, query)
+                    for _, name, arguments in calls
+                ]
+                yield from self._await(futures, TOOL_TIMEOUT)
+
+                msgs.append({
+                    "role": "assistant",
+                    "tool_calls": [
+                        {"id": call_id, "type": "function", "function": {"name": name, "arguments": arguments}}
+                        for call_id, name, arguments in calls
+                    ],
+                })
+                for (call_id, _, _), future in zip(calls, futures):
+                    if not future.done():
+                        future.cancel()  # only helps if it hasn't started; a running one stops at its deadline
+                        tool_result = {"error": f"Timed out after {TOOL_TIMEOUT:g}s."}
+                    elif future.exception() is not None:
+                        tool_result = {"error": str(future.exception())}
+                    else:
+                        tool_result = future.result()
+
+                    # Append tool results back to messages
+                    msgs.append({
+                        "role": "tool",
+                        "tool_call_id": call_id,
+                        "content": json.dumps(tool_result),
+                    })
 
             # Second API call: generate final answer with tool results (streaming)
-            stream = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=msgs,
-                temperature=0.5,
-                stream=True,
-            )
-
-            for chunk in stream:
-                delta = chunk.choices[0].delta
-                if delta and delta.content:
-                    content = delta.content
-                    yield content
+            with timed("llm", "gpt-4o-mini"):
+                stream = client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=msgs,
+                    temperature=0.5,
+                    stream=True,
+                )
+
+                for chunk in stream:
+                    delta = chunk.choices[0].delta
+                    if delta and delta.content:
+                        content = delta.content
+                        yield content
                     
         except Exception as e:
-            yield f"Error: {str(e)}"
\ No newline at end of file
+            yield f"Error: {str(e)}"
@@ -1,19 +1,38 @@
 """
 Weather search tools for real-time data
 """
-import requests
+import os
 from urllib.parse import urlencode
 
+from app._utils.http_client import get_client
+from app._utils.sqlite_store import SqliteTTLStore
+from app.search.forecast import ForecastCache
+from app.search.geocode import Geocoder
 
-def geocode_location(name: str):
+
+# Keep-alive pools per provider; retries/timeouts fit inside the AI tool timeout (AI_TOOL_TIMEOUT)
+nominatim = get_client(
+    "nominatim",
+    headers={"User-Agent": "WeatherJYJAM/1.0"},
+    timeout=float(os.getenv("NOMINATIM_TIMEOUT", 3)),
+    budget=float(os.getenv("NOMINATIM_BUDGET", 4.5)),
+    min_interval=1.0,  # usage policy: at most 1 request/s, retries included
+)
+open_meteo = get_client(
+    "open-meteo",
+    timeout=float(os.getenv("OPEN_METEO_TIMEOUT", 3)),
+    budget=float(os.getenv("OPEN_METEO_BUDGET", 4.5)),
+)
+
+
+def nominatim_geocode(name: str):
     """Use Nominatim to geocode a place name -> (lat, lon, display_name)"""
     url = "https://nominatim.openstreetmap.org/search?" + urlencode({
         "q": name,
         "format": "json",
         "limit": 1,
     })
-    r = requests.get(url, headers={"User-Agent": "WeatherJYJAM/1.0"}, timeout=15)
-    r.raise_for_status()
+    r = nominatim.get(url)
     data = r.json()
     if not data:
         return None
@@ -25,7 +44,18 @@ def geocode_location(name: str):
     }
 
 
-def fetch_open_meteo(lat: float, lon: float, tz: str = "Australia/Melbourne"):
+def create_geocoder(catalog=None) -> Geocoder:
+    """Geocoder for the live weather tool: cache, station `catalog` (returns a StationSearchIndex), then Nominatim"""
+    return Geocoder(
+        nominatim_geocode,
+        store=SqliteTTLStore("geocode"),
+        catalog=catalog,
+        ttl=float(os.getenv("GEOCODE_CACHE_TTL", 30 * 24 * 3600)),
+        min_interval=0.0,  # the nominatim client already spaces its calls, within the caller's deadline
+    )
+
+
+def open_meteo_forecast(lat: float, lon: float, tz: str = "Australia/Melbourne"):
     """Fetch current weather + today/hourly forecast from Open-Meteo"""
     params = {
         "latitude": lat,
@@ -35,7 +65,33 @@ def fetch_open_meteo(lat: float, lon: float, tz: str = "Australia/Melbourne"):
         "timezone": tz,
     }
     url = "https://api.open-meteo.com/v1/forecast?" + urlencode(params)
-    r = requests.get(url, timeout=15)
-    r.raise_for_status()
+    r = open_meteo.get(url)
     return r.json()
 
+
+forecasts = ForecastCache(
+    open_meteo_forecast,
+    store=SqliteTTLStore("forecast"),
+    grid=float(os.getenv("FORECAST_GRID_DEG", 0.1)),
+    ttl=float(os.getenv("FORECAST_CACHE_TTL", 3600)),
+)
+
+
+def fetch_open_meteo(lat: float, lon: float, tz: str = "Australia/Melbourne"):
+    """Current weather + hourly forecast for the grid cell around (lat, lon), cached per hour"""
+    return forecasts.get(lat, lon, tz)
+
+
+def get_live_weather(location: str, geocoder: Geocoder):
+    """get_live_weather tool: geocode `location`, then fetch its Open-Meteo forecast"""
+    geo = geocoder.geocode(location)
+    if not geo:
+        return {"error": f"Cannot geocode '{location}'."}
+
+    data = fetch_open_meteo(geo["lat"], geo["lon"])
+    return {
+        "location_input": location,
+        "resolved_location": geo,
+        "provider": "open-meteo",
+        "data": data,
+    }
@@ -1,48 +1,126 @@
-from flask import request
+from flask import Response, request
+from werkzeug.http import unquote_etag
 from flask_restx import Resource, Namespace
 from flask_jwt_extended import jwt_required, current_user
 
-from app.tabs.service import TabService
+from app._utils.jsonpatch import JsonPatchError
+from app.tabs.model import TAB_NAME_LENGTH, tab_etag, tab_summary, tab_version_from_etag, tabs_etag, valid_tab_name
+from app.tabs.service import TabConflictError, TabService
+from app.user.identity import trust_token_claims
 
 api = Namespace('my')
 tab_service = TabService()
 
 
+def conflict_response(error: TabConflictError):
+    """409 with the stored version so the client can re-fetch and retry"""
+    return {'success': False, 'message': str(error), 'tab_id': error.tab_id, 'version': error.version}, 409
+
+
+def etag_headers(etag: str) -> dict:
+    # Browsers keep the body but revalidate every time, so an unchanged workspace costs a 304
+    return {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+
+def not_modified(etag: str):
+    """304 if the client's If-None-Match already has this ETag, else None"""
+    if request.if_none_match.contains_weak(unquote_etag(etag)[0]):
+        return Response(status=304, headers=etag_headers(etag))
+    return None
+
+
+def _is_int(value) -> bool:
+    if isinstance(value, bool):
+        return False
+    try:
+        int(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def invalid_tabs(tabs_data) -> str:
+    """Why a PUT /tabs body can't be synced, or '' if it can"""
+    if not isinstance(tabs_data, list):
+        return "'tabs' must be a list"
+    seen_ids = set()
+    for index, tab_data in enumerate(tabs_data):
+        if not isinstance(tab_data, dict):
+            return f"tabs[{index}] must be an object"
+        tab_id = tab_data.get('id')
+        if tab_id is not None:
+            if not isinstance(tab_id, int) or isinstance(tab_id, bool):
+                return f"tabs[{index}].id must be an integer"
+            if tab_id in seen_ids:
+                return f"tabs[{index}].id {tab_id} appears more than once"
+            seen_ids.add(tab_id)
+        if tab_data.get('version') is not None and not _is_int(tab_data['version']):
+            return f"tabs[{index}].version must be an integer"
+        if not valid_tab_name(TabService.tab_values(tab_data)['tab_name']):
+            return f"tabs[{index}].tab_name must be a non-empty string of at most {TAB_NAME_LENGTH} characters"
+    return ''
+
+
 @api.route('/tabs')
 class MyTabsApi(Resource):
+    @trust_token_claims
     @jwt_required()
     def get(self):
-        """Get current user's tabs"""
-        tabs = tab_service.get_user_tabs(current_user.uid)
+        """Get current user's tabs (?summary=true for id/name/version only)"""
+        summaries = tab_service.get_tab_summaries(current_user.uid)
+        summary = request.args.get('summary', '').lower() in ('1', 'true', 'yes')
+        etag = tabs_etag(current_user.uid, summaries, summary=summary)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
+        if summary:
+            tabs = [tab_summary(*row) for row in summaries]
+        else:
+            tabs = [tab.to_dict() for tab in tab_service.get_user_tabs(current_user.uid)]
         return {
-            'tabs': [tab.to_dict() for tab in tabs]
-        }
+            'tabs': tabs
+        }, 200, etag_headers(etag)
 
     @jwt_required()
     def put(self):
-        """Update current user's tabs"""
-        data = request.get_json() or {}
-        tabs_data = data.get('tabs', [])
+        """Sync current user's tabs (only changed tabs are written)"""
+        data = request.get_json(silent=True) or {}
+        tabs_data = data.get('tabs', []) if isinstance(data, dict) else None
+        error = invalid_tabs(tabs_data)
+        if error:
+            api.abort(400, error)
         
-        # Update all tabs for the user
-        updated_tabs = tab_service.update_all_tabs(current_user.uid, tabs_data)
+        try:
+            updated_tabs, changes = tab_service.update_all_tabs(current_user.uid, tabs_data)
+        except TabConflictError as e:
+            return conflict_response(e)
         
         return {
             'success': True,
-            'tabs': [tab.to_dict() for tab in updated_tabs]
+            'tabs': [tab.to_dict() for tab in updated_tabs],
+            'changes': changes
         }
 
 
 @api.route('/tabs/<int:tab_id>')
 class MyTabApi(Resource):
+    @trust_token_claims
     @jwt_required()
     def get(self, tab_id):
         """Get a specific tab"""
+        version = tab_service.get_tab_version(tab_id, current_user.uid)
+        if version is None:
+            api.abort(404, f'Tab {tab_id} not found')
+        cached = not_modified(tab_etag(tab_id, version))
+        if cached is not None:
+            return cached
+
         tab = tab_service.get_tab_by_id(tab_id, current_user.uid)
         if not tab:
             api.abort(404, f'Tab {tab_id} not found')
         
-        return tab.to_dict()
+        return tab.to_dict(), 200, etag_headers(tab.etag)
 
     @jwt_required()
     def put(self, tab_id):
@@ -63,7 +141,35 @@ class MyTabApi(Resource):
         return {
             'success': True,
             'tab': tab.to_dict()
-        }
+        }, 200, {'ETag': tab.etag}
+
+    @jwt_required()
+    def patch(self, tab_id):
+        """Partially update a tab with a JSON Patch (application/json-patch+json)"""
+        operations = request.get_json(silent=True)
+        if not isinstance(operations, list):
+            api.abort(400, 'Body must be a JSON Patch array')
+
+        # If-Match: "tab-{id}-v{version}" makes the patch conditional on that version
+        expected_version = None
+        if request.if_match and not request.if_match.star_tag:
+            versions = [tab_version_from_etag(tab_id, etag) for etag in request.if_match]
+            expected_version = next((v for v in versions if v is not None), -1)
+        
+        try:
+            tab = tab_service.patch_tab(tab_id, current_user.uid, operations, expected_version)
+        except JsonPatchError as e:
+            api.abort(400, str(e))
+        except TabConflictError as e:
+            return conflict_response(e)
+        
+        if not tab:
+            api.abort(404, f'Tab {tab_id} not found')
+        
+        return {
+            'success': True,
+            'tab': tab.to_dict()
+        }, 200, {'ETag': tab.etag}
 
     @jwt_required()
     def delete(self, tab_id):
@@ -1,5 +1,5 @@
-import uuid
-from typing import Optional
+import hashlib
+from typing import Iterable, Optional, Tuple
 
 from sqlalchemy import String, Integer, ForeignKey, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -7,6 +7,44 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import db
 
 
+TAB_NAME_LENGTH = 100
+
+
+def tab_etag(tab_id: int, version: int) -> str:
+    """Strong ETag for one tab, changes whenever its version is bumped"""
+    return f'"tab-{tab_id}-v{version}"'
+
+
+def tab_version_from_etag(tab_id: int, etag: str) -> Optional[int]:
+    """Version a tab_etag() names, or None if it isn't one of this tab's ETags"""
+    prefix = f'tab-{tab_id}-v'
+    version = etag[len(prefix):] if etag.startswith(prefix) else ''
+    return int(version) if version.isdigit() else None
+
+
+def tabs_etag(uid: str, summaries: Iterable[Tuple[int, str, int]], summary: bool = False) -> str:
+    """ETag for a user's tab list from its (id, tab_name, version) rows; the summary listing gets its own"""
+    digest = hashlib.sha1(uid.encode('utf-8'))
+    for tab_id, tab_name, version in summaries:
+        digest.update(f"{tab_id}:{version}:{tab_name}\n".encode('utf-8'))
+    return f'"tabs-{"summary-" if summary else ""}{digest.hexdigest()[:20]}"'
+
+
+def valid_tab_name(tab_name) -> bool:
+    """A non-empty string that fits the tab_name column"""
+    return isinstance(tab_name, str) and 0 < len(tab_name) <= TAB_NAME_LENGTH
+
+
+def tab_summary(tab_id: int, tab_name: str, version: int) -> dict:
+    """Tab bar view of one (id, tab_name, version) row: no map/pin"""
+    return {
+        'id': tab_id,
+        'tab_name': tab_name,
+        'version': version,
+        'etag': tab_etag(tab_id, version),
+    }
+
+
 class Tab(db.Model):
     """Tab model using SQLAlchemy ORM"""
     __tablename__ = 'tabs'
@@ -18,9 +56,11 @@ class Tab(db.Model):
     uid: Mapped[str] = mapped_column(String(36), ForeignKey('users.uid'), nullable=False, index=True)
     
     # Tab fields
-    tab_name: Mapped[str] = mapped_column(String(100), nullable=False)
-    map: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)  # JSON field for map data
-    pin: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)  # JSON field for pin data
+    tab_name: Mapped[str] = mapped_column(String(TAB_NAME_LENGTH), nullable=False)
+    # JSON payloads are deferred: listings that only need names never load them
+    map: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, deferred=True)  # JSON field for map data
+    pin: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, deferred=True)  # JSON field for pin data
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default='1')  # bumped on every write
     
     # Relationship
     user: Mapped["User"] = relationship("User", back_populates="tabs")
@@ -28,6 +68,10 @@ class Tab(db.Model):
     def __repr__(self) -> str:
         return f"<Tab(id={self.id}, uid='{self.uid}', tab_name='{self.tab_name}')>"
     
+    @property
+    def etag(self) -> str:
+        return tab_etag(self.id, self.version)
+
     def to_dict(self) -> dict:
         """Convert model to dictionary"""
         return {
@@ -36,4 +80,6 @@ class Tab(db.Model):
             'tab_name': self.tab_name,
             'map': self.map,
             'pin': self.pin,
+            'version': self.version,
+            'etag': self.etag,
         }
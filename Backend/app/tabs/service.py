@@ -1,19 +1,46 @@
 # app/tabs/service.py
-from typing import List, Optional
+from typing import List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, insert, update
+from sqlalchemy.orm import undefer
+
+from app._utils.jsonpatch import JsonPatchError, apply_patch
 from app.database import db
-from app.tabs.model import Tab
+from app.tabs.model import TAB_NAME_LENGTH, Tab, valid_tab_name
+
+
+# JSON Patch may write these; anything else (version, id, uid) is read-only
+PATCHABLE_PATHS = ('/tab_name', '/map', '/pin')
+
+
+class TabConflictError(Exception):
+    """A tab was changed by someone else since the client (or we) last read it"""
+
+    def __init__(self, tab_id: Optional[int] = None, version: Optional[int] = None):
+        self.tab_id = tab_id
+        self.version = version
+        super().__init__(f"Tab {tab_id} has changed (now version {version})" if tab_id else "Tabs have changed")
 
 
 class TabService:
     """Service for tab operations"""
 
     def get_user_tabs(self, uid: str) -> List[Tab]:
-        """Get all tabs for a user"""
-        return Tab.query.filter_by(uid=uid).all()
+        """Get all tabs for a user, with map/pin"""
+        return Tab.query.options(undefer(Tab.map), undefer(Tab.pin)).filter_by(uid=uid).order_by(Tab.id).all()
+
+    def get_tab_summaries(self, uid: str) -> List[Tuple[int, str, int]]:
+        """(id, tab_name, version) of a user's tabs, without touching the JSON columns"""
+        rows = db.session.query(Tab.id, Tab.tab_name, Tab.version).filter_by(uid=uid).order_by(Tab.id).all()
+        return [tuple(row) for row in rows]
 
     def get_tab_by_id(self, tab_id: int, uid: str) -> Optional[Tab]:
         """Get a specific tab by ID (ensures it belongs to the user)"""
-        return Tab.query.filter_by(id=tab_id, uid=uid).first()
+        return Tab.query.options(undefer(Tab.map), undefer(Tab.pin)).filter_by(id=tab_id, uid=uid).first()
+
+    def get_tab_version(self, tab_id: int, uid: str) -> Optional[int]:
+        """Current version of a tab (None if it doesn't exist), for conditional requests"""
+        return db.session.query(Tab.version).filter_by(id=tab_id, uid=uid).scalar()
 
     def create_tab(self, uid: str, tab_name: str, map_data: dict = None, pin_data: dict = None) -> Tab:
         """Create a new tab for a user"""
@@ -40,6 +67,8 @@ class TabService:
         if pin_data is not None:
             tab.pin = pin_data
 
+        if db.session.is_modified(tab):
+            tab.version += 1
         db.session.commit()
         return tab
 
@@ -53,22 +82,122 @@ class TabService:
         db.session.commit()
         return True
 
-    def update_all_tabs(self, uid: str, tabs_data: List[dict]) -> List[Tab]:
-        """Update all tabs for a user (replace existing tabs)"""
-        # Delete existing tabs
-        Tab.query.filter_by(uid=uid).delete()
-        
-        # Create new tabs
-        new_tabs = []
+    def update_all_tabs(self, uid: str, tabs_data: List[dict]) -> Tuple[List[Tab], dict]:
+        """
+        Sync a user's tabs to tabs_data, writing only what changed.
+
+        Incoming tabs are matched to stored ones by `id`; tabs sent without an id are
+        matched to the remaining stored tabs in order, so clients that always send the
+        whole workspace keep stable ids. Changed tabs are bulk-updated with their version
+        bumped, new ones bulk-inserted, and tabs missing from tabs_data deleted. A tab
+        sent with a `version` older than the stored one raises TabConflictError.
+        Returns (tabs, {'created', 'updated', 'deleted', 'unchanged'}).
+        """
+        existing = self.get_user_tabs(uid)
+        by_id = {tab.id: tab for tab in existing}
+        claimed = {t['id'] for t in tabs_data if t.get('id') in by_id}
+        unclaimed = iter([tab for tab in existing if tab.id not in claimed])
+
+        inserts, updates, kept = [], [], set()
         for tab_data in tabs_data:
-            tab = Tab(
-                uid=uid,
-                tab_name=tab_data.get('tab_name', tab_data.get('name', 'Unnamed Tab')),
-                map=tab_data.get('map'),
-                pin=tab_data.get('pin')
-            )
-            db.session.add(tab)
-            new_tabs.append(tab)
-        
+            values = self.tab_values(tab_data)
+            tab = by_id.get(tab_data.get('id')) if tab_data.get('id') is not None else next(unclaimed, None)
+            if tab is None:
+                inserts.append({'uid': uid, 'version': 1, **values})
+                continue
+
+            kept.add(tab.id)
+            version = tab_data.get('version')
+            if version is not None and int(version) != tab.version:
+                raise TabConflictError(tab.id, tab.version)
+            if all(getattr(tab, key) == value for key, value in values.items()):
+                continue
+            updates.append({'b_id': tab.id, 'b_version': tab.version, 'version': tab.version + 1, **values})
+
+        deleted = [tab.id for tab in existing if tab.id not in kept]
+
+        try:
+            if updates:
+                table = Tab.__table__
+                result = db.session.execute(
+                    update(table)
+                    .where(table.c.id == bindparam('b_id'), table.c.version == bindparam('b_version'))
+                    .values(tab_name=bindparam('tab_name'), map=bindparam('map'),
+                            pin=bindparam('pin'), version=bindparam('version')),
+                    updates,
+                )
+                if result.rowcount not in (-1, len(updates)):
+                    # Someone else wrote one of these tabs since we read it
+                    raise TabConflictError()
+            if inserts:
+                db.session.execute(insert(Tab.__table__), inserts)
+            if deleted:
+                db.session.execute(delete(Tab).where(Tab.uid == uid, Tab.id.in_(deleted)))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        db.session.expire_all()
+        changes = {
+            'created': len(inserts),
+            'updated': len(updates),
+            'deleted': len(deleted),
+            'unchanged': len(kept) - len(updates),
+        }
+        return self.get_user_tabs(uid), changes
+
+    def patch_tab(self, tab_id: int, uid: str, operations: list, expected_version: Optional[int] = None) -> Optional[Tab]:
+        """
+        Apply a JSON Patch to {tab_name, map, pin, version} of one tab, e.g.
+        [{"op": "test", "path": "/version", "value": 3},
+         {"op": "replace", "path": "/pin/pins/0/position", "value": [-37.8, 144.9]}].
+        `version` can only be tested; expected_version (from If-Match) works the same way.
+        Returns None if the tab doesn't exist, raises JsonPatchError for bad patches and
+        TabConflictError if the tab changed meanwhile.
+        """
+        tab = self.get_tab_by_id(tab_id, uid)
+        if not tab:
+            return None
+        if expected_version is not None and expected_version != tab.version:
+            raise TabConflictError(tab.id, tab.version)
+
+        for operation in operations if isinstance(operations, list) else []:
+            if not isinstance(operation, dict):
+                continue
+            if operation.get('op') == 'test':
+                if operation.get('path') == '/version' and operation.get('value') != tab.version:
+                    raise TabConflictError(tab.id, tab.version)
+                continue
+            for path in (operation.get('path'), operation.get('from')):
+                if path is not None and not any(path == p or str(path).startswith(p + '/') for p in PATCHABLE_PATHS):
+                    raise JsonPatchError(f"Path '{path}' can't be modified")
+
+        document = {'tab_name': tab.tab_name, 'map': tab.map, 'pin': tab.pin, 'version': tab.version}
+        patched = apply_patch(document, operations)
+        changed = {key: patched.get(key) for key in ('tab_name', 'map', 'pin') if patched.get(key) != document[key]}
+        if not changed:
+            return tab
+        if 'tab_name' in changed and not valid_tab_name(changed['tab_name']):
+            raise JsonPatchError(f"tab_name must be a non-empty string of at most {TAB_NAME_LENGTH} characters")
+
+        result = db.session.execute(
+            update(Tab.__table__)
+            .where(Tab.__table__.c.id == tab.id, Tab.__table__.c.version == tab.version)
+            .values(version=tab.version + 1, **changed)
+        )
+        if result.rowcount == 0:
+            db.session.rollback()
+            raise TabConflictError(tab.id)
         db.session.commit()
-        return new_tabs
+        db.session.refresh(tab)
+        return tab
+
+    @staticmethod
+    def tab_values(tab_data: dict) -> dict:
+        """Columns a PUT /tabs entry writes; `name` is accepted for tab_name, which defaults to 'Unnamed Tab'"""
+        return {
+            'tab_name': tab_data.get('tab_name', tab_data.get('name', 'Unnamed Tab')),
+            'map': tab_data.get('map'),
+            'pin': tab_data.get('pin'),
+        }
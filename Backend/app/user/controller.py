@@ -4,6 +4,8 @@ from flask_restx import Resource, Namespace
 from flask_jwt_extended import create_access_token, jwt_required, current_user
 from sqlalchemy.exc import IntegrityError
 
+from app.user.identity import identity_claims, trust_token_claims
+from app.user.passwords import HashingBusyError
 from app.user.service import UserService
 from app._utils.serializer import to_dict
 
@@ -12,6 +14,11 @@ meapi = Namespace('me')
 user_service = UserService()
 
 
+def busy_response(error: HashingBusyError):
+    """503 + Retry-After when the password hashing pool is saturated"""
+    return {'success': False, 'message': str(error)}, 503, {'Retry-After': '1'}
+
+
 @api.route('/users')
 class UserListApi(Resource):
     def get(self):
@@ -41,6 +48,8 @@ class UserApi(Resource):
                 'message': 'User updated successfully',
                 'user': to_dict(user)
             }
+        except HashingBusyError as e:
+            return busy_response(e)
         except IntegrityError as e:
             if 'UNIQUE constraint failed: users.email' in str(e) or 'Duplicate entry' in str(e):
                 api.abort(400, 'Email already exists')
@@ -79,6 +88,8 @@ class RegisterApi(Resource):
                 'message': 'User created successfully',
                 'user': to_dict(user)
             }, 201
+        except HashingBusyError as e:
+            return busy_response(e)
         except IntegrityError as e:
             # handle unique constraint error
             if 'UNIQUE constraint failed: users.email' in str(e) or 'Duplicate entry' in str(e):
@@ -99,13 +110,17 @@ class LoginApi(Resource):
         if not email or not password:
             api.abort(400, 'Email and password are required')
         
-        user = user_service.authenticate_user(email, password)
+        try:
+            user = user_service.authenticate_user(email, password)
+        except HashingBusyError as e:
+            return busy_response(e)
         if not user:
             api.abort(401, 'Invalid credentials')
         
         # Create JWT token
         access_token = create_access_token(
             identity=user.uid,
+            additional_claims=identity_claims(user),
             expires_delta=datetime.timedelta(days=30)
         )
         
@@ -139,6 +154,7 @@ class MeApi(Resource):
 
 @meapi.route('/setting')
 class MySettingApi(Resource):
+    @trust_token_claims
     @jwt_required()
     def get(self):
         """Get current user's setting (dummy)"""
@@ -163,6 +179,7 @@ class MySettingApi(Resource):
 
 @meapi.route('/avatar')
 class MeAvatarApi(Resource):
+    @trust_token_claims
     @jwt_required()
     def get(self):
         """Get current user avatar (dummy)"""
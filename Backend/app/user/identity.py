@@ -0,0 +1,60 @@
+from typing import Callable, Optional
+
+from flask import current_app, request
+
+
+class UserIdentity:
+    """
+    Lightweight snapshot of a user for `current_user`: what endpoints read from it
+    (uid, name, email, to_dict) without holding an ORM instance across requests
+    """
+    __slots__ = ('uid', 'name', 'email')
+
+    def __init__(self, uid: str, name: Optional[str], email: Optional[str]):
+        self.uid = uid
+        self.name = name
+        self.email = email
+
+    def __repr__(self) -> str:
+        return f"<UserIdentity(uid='{self.uid}')>"
+
+    @classmethod
+    def from_user(cls, user) -> "UserIdentity":
+        return cls(user.uid, user.name, user.email)
+
+    @classmethod
+    def from_claims(cls, jwt_data: dict) -> Optional["UserIdentity"]:
+        """Identity from the token itself, None for tokens issued without name/email claims"""
+        if 'name' not in jwt_data or 'email' not in jwt_data:
+            return None
+        return cls(jwt_data['sub'], jwt_data['name'], jwt_data['email'])
+
+    def to_dict(self) -> dict:
+        return {
+            'uid': self.uid,
+            'name': self.name,
+            'email': self.email,
+        }
+
+
+def identity_claims(user) -> dict:
+    """Extra JWT claims so trusted endpoints can skip the user lookup"""
+    return {'name': user.name, 'email': user.email}
+
+
+def trust_token_claims(method: Callable) -> Callable:
+    """
+    Mark a Resource method as fine with `current_user` built from the token's claims
+    (no user lookup). Only for endpoints that need nothing beyond uid/name/email and can
+    live with a deleted or renamed user until the token expires.
+    """
+    method.trust_token_claims = True
+    return method
+
+
+def view_trusts_token_claims() -> bool:
+    """Whether the Resource method serving this request is marked with @trust_token_claims"""
+    view = current_app.view_functions.get(request.endpoint)
+    view_class = getattr(view, 'view_class', None)
+    method = getattr(view_class, request.method.lower(), None)
+    return bool(getattr(method, 'trust_token_claims', False))
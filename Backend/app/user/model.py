@@ -1,5 +1,4 @@
 import uuid
-import bcrypt
 from datetime import datetime
 from typing import Optional
 
@@ -7,6 +6,7 @@ from sqlalchemy import String, DateTime, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import db
+from app.user.passwords import hash_password, needs_rehash, verify_password
 
 
 class User(db.Model):
@@ -29,13 +29,16 @@ class User(db.Model):
         return f"<User(uid='{self.uid}', name='{self.name}', email='{self.email}')>"
     
     def set_password(self, password: str) -> None:
-        """Hash and set password"""
-        salt = bcrypt.gensalt()
-        self.password = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        """Hash and set password (on the bcrypt pool, may raise HashingBusyError)"""
+        self.password = hash_password(password)
     
     def check_password(self, password: str) -> bool:
-        """Check if provided password matches stored hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password.encode('utf-8'))
+        """Check if provided password matches stored hash (on the bcrypt pool, may raise HashingBusyError)"""
+        return verify_password(password, self.password)
+
+    def password_needs_rehash(self) -> bool:
+        """Stored hash uses a different bcrypt cost than BCRYPT_ROUNDS"""
+        return needs_rehash(self.password)
     
     def to_dict(self) -> dict:
         """Convert model to dictionary (exclude password)"""
@@ -0,0 +1,60 @@
+"""
+Password hashing off the request threads.
+
+bcrypt runs on a small bounded pool (BCRYPT_WORKERS threads; bcrypt releases the GIL
+while hashing), so a burst of logins/registrations uses at most that many cores and
+the read endpoints keep theirs. Each hash also holds the request thread that waits
+for it, so at most BCRYPT_QUEUE hashes (fewer than gunicorn's threads per worker) are
+admitted at once; further requests fail fast with HashingBusyError (HTTP 503) rather
+than waiting on a request thread that reads need.
+The cost factor is BCRYPT_ROUNDS; hashes made with another cost are upgraded on login.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+# Hashes admitted at once (running + queued). Each holds a request thread: keep one per worker free
+REQUEST_THREADS = int(os.getenv("GUNICORN_THREADS", 4))
+BCRYPT_QUEUE = max(1, min(int(os.getenv("BCRYPT_QUEUE", REQUEST_THREADS - 1)), REQUEST_THREADS - 1))
+
+_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_slots = threading.BoundedSemaphore(BCRYPT_QUEUE)
+
+
+class HashingBusyError(RuntimeError):
+    """Too many password hashes in flight, the caller should retry shortly"""
+
+
+def _run(fn, *args):
+    # No waiting for a slot: a blocked request thread starves reads as much as a hashing one
+    if not _slots.acquire(blocking=False):
+        raise HashingBusyError("Too many login attempts in progress, please retry shortly")
+    try:
+        return _executor.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password: str) -> str:
+    """bcrypt hash of password at the configured cost"""
+    def work(secret: bytes) -> str:
+        return bcrypt.hashpw(secret, bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+    return _run(work, password.encode('utf-8'))
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    """Check password against a bcrypt hash"""
+    return _run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def needs_rehash(hashed: str) -> bool:
+    """Whether a hash ($2b$<cost>$...) was made with a different cost than BCRYPT_ROUNDS"""
+    try:
+        return int(hashed.split('$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
@@ -1,11 +1,23 @@
+import os
 from typing import List, Optional
 
+from app._utils.cache import TTLCache
+from app.user.identity import UserIdentity
 from app.user.model import User
+from app.user.passwords import HashingBusyError
 from app.database import db
 
 
 class UserService:
     """User service layer for business logic"""
+
+    def __init__(self):
+        # uid -> UserIdentity for JWT requests; per process, so other workers may serve
+        # a changed/deleted user for up to USER_CACHE_TTL seconds
+        self._identities = TTLCache(
+            maxsize=int(os.getenv("USER_CACHE_SIZE", 1024)),
+            ttl=float(os.getenv("USER_CACHE_TTL", 60)),
+        )
     
     def create_user(self, name: str, email: str, password: str) -> User:
         """Create a new user"""
@@ -25,6 +37,17 @@ class UserService:
         """Get user by email"""
         return db.session.query(User).filter_by(email=email).first()
     
+    def get_identity(self, uid: str) -> Optional[UserIdentity]:
+        """Identity for a JWT subject, from the cache or the database"""
+        identity = self._identities.get(uid)
+        if identity is None:
+            user = self.get_user_by_id(uid)
+            if not user:
+                return None
+            identity = UserIdentity.from_user(user)
+            self._identities.set(uid, identity)
+        return identity
+
     def get_all_users(self) -> List[User]:
         """Get all users"""
         return db.session.query(User).all()
@@ -37,6 +60,14 @@ class UserService:
         user = self.get_user_by_email(email)
         
         if user and user.check_password(password):
+            if user.password_needs_rehash():
+                # BCRYPT_ROUNDS changed: upgrade the stored hash while we have the password
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                except HashingBusyError:
+                    pass  # the login itself succeeded; upgrade on a quieter login
+            self._identities.set(user.uid, UserIdentity.from_user(user))
             return user
         
         return None
@@ -55,6 +86,7 @@ class UserService:
             user.set_password(password)
         
         db.session.commit()
+        self._identities.pop(uid)
         return user
     
     def delete_user(self, uid: str) -> bool:
@@ -65,4 +97,5 @@ class UserService:
         
         db.session.delete(user)
         db.session.commit()
+        self._identities.pop(uid)
         return True
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""
+Optional embedded analytics over a Parquet export of `weather_data`.
+
+`flask weather export-parquet` writes `weather_data` to a single Parquet file
+sorted by station and date. When DuckDB is installed and the file exists,
+monthly averages (and daily series, when the columnar store isn't built) are
+answered by vectorized DuckDB scans in-process: no database round trip, no
+Decimal conversion, and the weather read path keeps working offline.
+
+Without duckdb or without an export, WeatherService falls back to the
+`weather_monthly` rollups and `weather_data` as before.
+"""
+import csv
+import os
+import tempfile
+import threading
+from datetime import date
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import text as sqlalchemy_text
+
+from app.weather.store import STORE_FIELDS, WeatherSeries
+
+try:
+    import duckdb
+except ImportError:  # optional dependency
+    duckdb = None
+
+
+EXPORT_CHUNK_ROWS = 50_000
+ROW_GROUP_SIZE = 122_880  # DuckDB's default; min/max stats per group let station filters skip the rest
+
+# Same averages as the weather_monthly rollups, straight from the daily rows
+MONTHLY_AVERAGES = """
+    SELECT
+        station_name AS "Station Name",
+        MIN(date) AS "Date",
+        AVG(rain_mm) AS "Avg_Rainfall",
+        AVG((max_temp_c + min_temp_c) / 2) AS "Avg_Temperature",
+        AVG((max_rh_pct + min_rh_pct) / 2) AS "Avg_Relative_Humidity",
+        AVG(wind_ms) AS "Avg_Wind_Speed"
+    FROM
+        weather
+    WHERE
+        station_name = ?
+    GROUP BY
+        station_name,
+        date_trunc('month', date)
+    ORDER BY
+        "Date",
+        "Station Name"
+"""
+
+
+def available() -> bool:
+    return duckdb is not None
+
+
+class WeatherAnalytics:
+    """DuckDB view over a Parquet file written by export_parquet()"""
+
+    def __init__(self, path: str):
+        if duckdb is None:
+            raise RuntimeError("duckdb is not installed")
+        self.path = path
+        self._inode = self._current_inode()
+        self._pid = None
+        self._db = None
+        self._station_names: Optional[List[str]] = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(path)
+
+    def _current_inode(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_ino
+        except OSError:
+            return None
+
+    def is_stale(self) -> bool:
+        """True once the file has been re-exported (or removed) since this view was opened"""
+        return self._current_inode() != self._inode
+
+    def _cursor(self):
+        # One in-memory database per process (DuckDB handles don't survive fork),
+        # one cursor per thread (a cursor isn't safe to share between threads)
+        pid = os.getpid()
+        with self._lock:
+            if self._pid != pid:
+                self._db = duckdb.connect(database=':memory:')
+                path = self.path.replace("'", "''")
+                self._db.execute(f"CREATE VIEW weather AS SELECT * FROM read_parquet('{path}')")
+                self._pid = pid
+                self._local = threading.local()
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            cursor = self._local.cursor = self._db.cursor()
+        return cursor
+
+    def _fetch_dicts(self, query: str, params: list) -> List[dict]:
+        cursor = self._cursor()
+        cursor.execute(query, params)
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def station_names(self) -> List[str]:
+        """Distinct station names in the export (the same list object on every call)"""
+        if self._station_names is None:
+            cursor = self._cursor()
+            cursor.execute("SELECT DISTINCT station_name FROM weather ORDER BY station_name")
+            self._station_names = [row[0] for row in cursor.fetchall()]
+        return self._station_names
+
+    def monthly_averages(self, station_name: str) -> List[dict]:
+        """Monthly averages shaped like the avg_ endpoint's rows (Date is the month's first day)"""
+        rows = self._fetch_dicts(MONTHLY_AVERAGES, [station_name])
+        for row in rows:
+            row['Date'] = row['Date'].isoformat()
+        return rows
+
+    def series(self, station_name: str, start: Optional[date] = None, end: Optional[date] = None) -> Optional[WeatherSeries]:
+        """A station's daily history in [start, end], None if the station has no rows"""
+        fields = list(STORE_FIELDS.values())
+        query = f"""
+            SELECT date, {', '.join(fields)}
+            FROM weather
+            WHERE station_name = ?
+            {"AND date >= ?" if start else ""}
+            {"AND date <= ?" if end else ""}
+            ORDER BY date
+        """
+        params = [station_name] + [d for d in (start, end) if d]
+        cursor = self._cursor()
+        cursor.execute(query, params)
+        columns = cursor.fetchnumpy()
+        if not len(columns['date']):
+            return None
+
+        dates = np.asarray(columns['date']).astype('datetime64[D]')
+        return WeatherSeries(station_name, dates, {
+            field: np.ma.filled(np.ma.asarray(columns[name], dtype=np.float64), np.nan)
+            for field, name in STORE_FIELDS.items()
+        })
+
+
+def export_parquet(engine, path: str, chunk_rows: int = EXPORT_CHUNK_ROWS) -> int:
+    """
+    Export weather_data to a Parquet file at `path`, returns the row count.
+    Rows are staged through a temporary CSV (no pandas/pyarrow needed), then DuckDB
+    writes the sorted Parquet file next to `path` and it is swapped in at the end.
+    """
+    if duckdb is None:
+        raise RuntimeError("duckdb is not installed (pip install duckdb)")
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    fields = list(STORE_FIELDS.values())
+    select_columns = ', '.join(f'`{field}`' for field in STORE_FIELDS)
+    query = f"""
+        SELECT
+            `Station Name`,
+            Date,
+            {select_columns}
+        FROM
+            weather_data
+    """
+
+    fd, csv_path = tempfile.mkstemp(prefix='.weather_data-', suffix='.csv', dir=parent)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        rows = 0
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as out, engine.connect() as conn:
+            writer = csv.writer(out)
+            result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(
+                sqlalchemy_text(query)
+            )
+            for chunk in result.partitions(chunk_rows):
+                writer.writerows(
+                    (row[0], str(row[1])[:10], *('' if v is None else v for v in row[2:]))
+                    for row in chunk
+                )
+                rows += len(chunk)
+        if not rows:
+            raise ValueError("weather_data is empty, nothing to export")
+
+        types = {'station_name': 'VARCHAR', 'date': 'DATE', **{name: 'DOUBLE' for name in fields}}
+        columns = ', '.join(f"'{name}': '{kind}'" for name, kind in types.items())
+        con = duckdb.connect(database=':memory:')
+        try:
+            con.execute(f"""
+                COPY (
+                    SELECT * FROM read_csv(?, header = false, columns = {{{columns}}}, nullstr = '')
+                    ORDER BY station_name, date
+                ) TO '{tmp_path.replace("'", "''")}' (FORMAT parquet, COMPRESSION zstd, ROW_GROUP_SIZE {ROW_GROUP_SIZE})
+            """, [csv_path])
+        finally:
+            con.close()
+
+        # Readers that opened the old file keep it until they notice the new inode
+        os.replace(tmp_path, path)
+        return rows
+    finally:
+        for leftover in (csv_path, tmp_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
@@ -0,0 +1,112 @@
+"""
+Response cache for the weather endpoints.
+
+Encoded response bodies are cached per endpoint, station and query string and
+served with an ETag, so repeat views skip the database and JSON encoding and
+clients holding the same ETag get a 304. Invalidation bumps a stamp file in the
+instance folder, which lets every worker process drop its entries after new
+data is loaded (e.g. by `flask weather refresh-rollups` in another process).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Hashable, Optional, Tuple
+
+from flask import Response, current_app, request
+
+from app._utils.cache import TTLCache
+
+
+class WeatherResponseCache:
+    """Bounded LRU/TTL cache of encoded weather responses with ETag support"""
+
+    STAMP_CHECK_INTERVAL = 1.0  # seconds between stamp file stats
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = 3600, stamp_path: Optional[str] = None):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._stamp_path = stamp_path
+        self._generation = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def stamp_path(self) -> str:
+        if self._stamp_path is None:
+            self._stamp_path = os.path.join(current_app.instance_path, 'weather_data.stamp')
+        return self._stamp_path
+
+    def _current_generation(self):
+        """Stamp file mtime, re-read at most once per STAMP_CHECK_INTERVAL"""
+        now = time.monotonic()
+        if now - self._checked_at >= self.STAMP_CHECK_INTERVAL:
+            try:
+                generation = os.stat(self.stamp_path).st_mtime_ns
+            except OSError:
+                generation = None
+            with self._lock:
+                if generation != self._generation:
+                    self._cache.clear()
+                    self._generation = generation
+                self._checked_at = now
+        return self._generation
+
+    def respond(
+        self,
+        key: Hashable,
+        producer: Callable[[], object],
+        encode: Optional[Callable[[object], Tuple[bytes, str]]] = None,
+        variant: Hashable = None,
+    ) -> Optional[Response]:
+        """
+        Serve `key` (plus the request's query string and `variant`, e.g. the negotiated
+        mimetype) from cache, or build it with producer() and encode() (JSON by default).
+        Returns None when producer() yields no data. Honors If-None-Match with a 304.
+        """
+        generation = self._current_generation()
+        cache_key = (key, variant, tuple(sorted(request.args.items(multi=True))))
+
+        entry = self._cache.get(cache_key)
+        if entry is None:
+            payload = producer()
+            if not payload:
+                return None
+            if encode is None:
+                body, mimetype = json.dumps(payload).encode('utf-8'), 'application/json'
+            else:
+                body, mimetype = encode(payload)
+            etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+            entry = (body, mimetype, etag)
+            # Don't store entries produced against a stamp that changed meanwhile
+            if generation == self._generation:
+                self._cache.set(cache_key, entry)
+
+        body, mimetype, etag = entry
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['Vary'] = 'Accept'
+        return response.make_conditional(request)
+
+    def invalidate(self) -> None:
+        """Drop cached responses here and, via the stamp file, in every other worker"""
+        self._cache.clear()
+        try:
+            os.makedirs(os.path.dirname(self.stamp_path), exist_ok=True)
+            with open(self.stamp_path, 'a'):
+                os.utime(self.stamp_path, None)
+        except OSError as e:
+            print(f"⚠️  Could not update weather cache stamp: {e}")
+        # Force the next request to re-read the stamp
+        self._checked_at = 0.0
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+response_cache = WeatherResponseCache(
+    maxsize=int(os.getenv('WEATHER_CACHE_SIZE', 256)),
+    ttl=float(os.getenv('WEATHER_CACHE_TTL', 3600)),
+    stamp_path=os.getenv('WEATHER_CACHE_STAMP'),
+)
@@ -0,0 +1,39 @@
+import click
+from flask.cli import AppGroup
+
+from app.weather.cache import response_cache
+from app.weather.service import weather_service
+
+weather_cli = AppGroup('weather', help='Weather data maintenance commands')
+
+
+@weather_cli.command('refresh-rollups')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Re-aggregate months from this date on (default: the latest rolled-up month of any '
+                   'station, so backfilled older months or a new station\'s history need --since or --full)')
+@click.option('--full', is_flag=True, help='Rebuild every month from scratch')
+def refresh_rollups(since, full):
+    """Build weather_monthly, or refresh it after loading new daily rows"""
+    count = weather_service.refresh_monthly_rollups(since=since.date() if since else None, full=full)
+    click.echo(f'Refreshed {count} station-months')
+
+
+@weather_cli.command('clear-cache')
+def clear_cache():
+    """Invalidate cached weather responses in every worker (after loading new data)"""
+    response_cache.invalidate()
+    click.echo(f'Invalidated weather response cache ({response_cache.stamp_path})')
+
+
+@weather_cli.command('build-store')
+def build_store():
+    """Export weather_data into the memory-mapped columnar store"""
+    count = weather_service.build_store()
+    click.echo(f'Wrote {count} rows to {weather_service.store_directory()}')
+
+
+@weather_cli.command('export-parquet')
+def export_parquet():
+    """Export weather_data to Parquet for the DuckDB analytics backend (needs duckdb)"""
+    count = weather_service.export_parquet()
+    click.echo(f'Wrote {count} rows to {weather_service.parquet_path()}')
@@ -1,35 +1,133 @@
-from flask import request
+import base64
+import json
+import math
+from datetime import date
+
+from flask import Response, request, stream_with_context
 from flask_restx import Resource, Namespace
 
-from app.database import db
+from app.database import READ_BIND, db, pool_stats
 import sqlalchemy
 
-from app.weather.service import WeatherService
-from app._utils.serializer import to_dict
+from app.weather.cache import response_cache
+from app.weather.downsample import RESOLUTIONS
+from app.weather.encoding import available_mimetypes, encode_series, negotiate
+from app.weather.service import weather_service
 
 
 api = Namespace('weather')
-weather_service = WeatherService()
+
+def encode_cursor(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str):
+    station, day = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return str(station), str(day)
+
+
+def valid_point(lat: float, lng: float) -> bool:
+    """Finite latitude in [-90, 90] and longitude in [-180, 180] (float() accepts nan/inf)"""
+    return math.isfinite(lat) and math.isfinite(lng) and -90 <= lat <= 90 and -180 <= lng <= 180
+
+
+def json_array(rows):
+    """Yield a JSON list of rows piece by piece"""
+    yield '['
+    for i, row in enumerate(rows):
+        yield (',' if i else '') + json.dumps(row)
+    yield ']'
+
 
 @api.route('/')
 class WeatherListApi(Resource):
+    DEFAULT_LIMIT = 1000
+    MAX_LIMIT = 10000
+
     def get(self):
-        """Get all weather stations"""
-        weathers = weather_service.get_all_weather_stations()
-        return [to_dict(weather) for weather in weathers]
+        """
+        Get weather rows for all stations. Without paging parameters: every row as a bare JSON list
+        (streamed, as before). With ?limit= and/or ?cursor=: one keyset page as {data, next_cursor}.
+        ?format=ndjson (or Accept: application/x-ndjson) streams every row from the cursor on instead.
+        """
+        try:
+            after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+            limit = int(request.args.get('limit', self.DEFAULT_LIMIT))
+        except (ValueError, TypeError):
+            return {"status": "error", "message": "Invalid cursor or limit"}, 400
+
+        wants_ndjson = (
+            request.args.get('format') == 'ndjson'
+            or request.accept_mimetypes.best == 'application/x-ndjson'
+        )
+        if wants_ndjson:
+            rows = weather_service.stream_all_weather_stations(after=after)
+            return Response(
+                stream_with_context(json.dumps(row) + '\n' for row in rows),
+                mimetype='application/x-ndjson',
+                headers={'X-Accel-Buffering': 'no'},
+            )
+
+        if 'limit' not in request.args and 'cursor' not in request.args:
+            # Original response shape for existing clients, without holding the table in memory
+            rows = weather_service.stream_all_weather_stations()
+            return Response(
+                stream_with_context(json_array(rows)),
+                mimetype='application/json',
+                headers={'X-Accel-Buffering': 'no'},
+            )
+
+        limit = max(1, min(limit, self.MAX_LIMIT))
+        rows, next_after = weather_service.get_all_weather_stations(limit=limit, after=after)
+        return {
+            'data': rows,
+            'next_cursor': encode_cursor(next_after) if next_after else None,
+        }
     
 @api.route('/<string:station_name>')
 class WeatherApi(Resource):
     def get(self, station_name):
-        """Get weather data by station name"""
+        """
+        Get weather data by station name.
+        Optional ?start=YYYY-MM-DD&end=YYYY-MM-DD, ?resolution=daily|weekly|monthly
+        and ?max_points=N (LTTB downsampling for charts).
+        Accept (or ?format=rows|columns|msgpack|arrow) selects per-day rows or a columnar encoding.
+        """
         print(f"Fetching weather data for station: {station_name}")
 
-        weather = weather_service.get_weather_by_station(station_name)
+        try:
+            start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+            end = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+        except ValueError:
+            return {"status": "error", "message": "start/end must be YYYY-MM-DD"}, 400
+        try:
+            max_points = int(request.args['max_points']) if request.args.get('max_points') else None
+        except ValueError:
+            return {"status": "error", "message": "max_points must be an integer"}, 400
+
+        resolution = request.args.get('resolution', 'daily')
+        if resolution not in RESOLUTIONS:
+            return {"status": "error", "message": f"resolution must be one of {', '.join(RESOLUTIONS)}"}, 400
+        if max_points is not None and max_points < 3:
+            return {"status": "error", "message": "max_points must be at least 3"}, 400
 
-        if not weather:
+        mimetype = negotiate(request)
+        if mimetype is None:
+            return {"status": "error", "message": f"Supported formats: {', '.join(available_mimetypes())}"}, 406
+
+        response = response_cache.respond(
+            ('station', station_name),
+            lambda: weather_service.get_chart_series(
+                station_name, start=start, end=end, resolution=resolution, max_points=max_points
+            ),
+            encode=lambda series: encode_series(series, mimetype),
+            variant=mimetype,
+        )
+
+        if response is None:
             api.abort(404, f"Weather data for station '{station_name}' not found")
 
-        return weather, 200
+        return response
     
 @api.route('/avg_<string:station_name>')
 class WeatherApi(Resource):
@@ -37,23 +135,43 @@ class WeatherApi(Resource):
         """Get weather data by station name"""
         print(f"Fetching weather data for station: {station_name}")
 
-        weather = weather_service.get_avg_weather_by_station(station_name)
+        response = response_cache.respond(
+            ('avg', station_name),
+            lambda: weather_service.get_avg_weather_by_station(station_name),
+        )
 
-        if not weather:
+        if response is None:
             api.abort(404, f"Weather data for station '{station_name}' not found")
 
-        return weather, 200
+        return response
 
 @api.route("/nearest")
 class NearestStation(Resource):
     def get(self,):
-        """Get nearest weather station given lat/lng query params"""
+        """Get nearest weather station given lat/lng (optional k or radius in km) query params"""
         try:
             lat = float(request.args.get("lat"))
             lng = float(request.args.get("lng"))
         except (TypeError, ValueError):
             return {"status": "error", "message": "Invalid or missing lat/lng"}, 400
-        
+        if not valid_point(lat, lng):
+            return {"status": "error", "message": "lat must be within [-90, 90] and lng within [-180, 180]"}, 400
+
+        try:
+            k = int(request.args["k"]) if "k" in request.args else None
+            radius = float(request.args["radius"]) if "radius" in request.args else None
+        except ValueError:
+            return {"status": "error", "message": "Invalid k/radius"}, 400
+        if radius is not None and not (math.isfinite(radius) and radius >= 0):
+            return {"status": "error", "message": "radius must be a non-negative number of km"}, 400
+
+        # Optional k-nearest / within-radius lookups return a list of stations
+        if radius is not None:
+            return {"status": "success", "data": weather_service.get_stations_within(lat, lng, radius)}, 200
+        if k is not None:
+            if k < 1:
+                return {"status": "error", "message": "k must be at least 1"}, 400
+            return {"status": "success", "data": weather_service.get_nearest_stations(lat, lng, k)}, 200
 
         weather = weather_service.get_nearest_station(lat, lng)
         if not weather:
@@ -61,6 +179,43 @@ class NearestStation(Resource):
 
         return {"status": "success", "data": weather}, 200
     
+@api.route("/nearest/batch")
+class NearestStationBatch(Resource):
+    MAX_POINTS = 1000
+
+    def post(self):
+        """Get nearest weather stations for many points: {"points": [{"lat": .., "lng": ..}], "k": 1}"""
+        data = request.get_json(silent=True) or {}
+        raw_points = data.get("points")
+        if not isinstance(raw_points, list) or not raw_points:
+            return {"status": "error", "message": "points must be a non-empty list"}, 400
+        if len(raw_points) > self.MAX_POINTS:
+            return {"status": "error", "message": f"At most {self.MAX_POINTS} points per request"}, 400
+
+        try:
+            k = int(data.get("k", 1))
+            points = [
+                (float(p["lat"]), float(p["lng"])) if isinstance(p, dict) else (float(p[0]), float(p[1]))
+                for p in raw_points
+            ]
+        except (KeyError, IndexError, TypeError, ValueError):
+            return {"status": "error", "message": "Invalid lat/lng in points or invalid k"}, 400
+        if not all(valid_point(lat, lng) for lat, lng in points):
+            return {"status": "error", "message": "Every lat must be within [-90, 90] and lng within [-180, 180]"}, 400
+        if k < 1:
+            return {"status": "error", "message": "k must be at least 1"}, 400
+
+        nearest = weather_service.get_nearest_stations_batch(points, k=k)
+
+        # Mirror /nearest: a single station per point, or a list when k is given
+        return {
+            "status": "success",
+            "data": [
+                {"lat": lat, "lng": lng, "data": (stations if "k" in data else (stations[0] if stations else None))}
+                for (lat, lng), stations in zip(points, nearest)
+            ],
+        }, 200
+    
 @api.route('/test-db')
 class TestDatabaseConnection(Resource):
     def get(self):
@@ -69,6 +224,13 @@ class TestDatabaseConnection(Resource):
             # This will run a lightweight SQL query to check the connection
             result = db.session.execute(sqlalchemy.text("SELECT NOW();"))
             row = result.fetchone()
-            return {"status": "success", "current_time": str(row[0])}, 200
+            return {"status": "success", "current_time": str(row[0]), **self.pools()}, 200
         except Exception as e:
-            return {"status": "error", "message": str(e)}, 500
\ No newline at end of file
+            return {"status": "error", "message": str(e), **self.pools()}, 500
+
+    @staticmethod
+    def pools() -> dict:
+        pools = {"pool": pool_stats(db.engine)}
+        if READ_BIND in db.engines:
+            pools["read_pool"] = pool_stats(db.engines[READ_BIND])
+        return pools
\ No newline at end of file
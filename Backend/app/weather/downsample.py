@@ -0,0 +1,104 @@
+"""
+Chart-oriented reductions of daily station series.
+
+`resample` averages days into weekly or monthly buckets, and `lttb` picks the
+indices of a Largest-Triangle-Three-Buckets downsample, which keeps the visual
+peaks and troughs of a line chart while sending a small fraction of the points.
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+RESOLUTIONS = ('daily', 'weekly', 'monthly')
+
+
+def bucket_keys(dates: np.ndarray, resolution: str) -> np.ndarray:
+    """Integer bucket id per day; weeks start on Monday, months are calendar months"""
+    if resolution == 'monthly':
+        return dates.astype('datetime64[M]').astype(np.int64)
+    if resolution == 'weekly':
+        # 1970-01-01 was a Thursday, shift so buckets start on Monday
+        return (dates.astype('datetime64[D]').astype(np.int64) + 3) // 7
+    raise ValueError(f"Unknown resolution '{resolution}'")
+
+
+def resample(dates: np.ndarray, columns: Dict[str, np.ndarray], resolution: str) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Average sorted daily values into weekly/monthly buckets, ignoring missing (NaN) days.
+    Each bucket is dated by its first day with data.
+    """
+    if resolution == 'daily' or not len(dates):
+        return dates, columns
+
+    keys = bucket_keys(dates, resolution)
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    resampled = {}
+    for field, values in columns.items():
+        values = np.asarray(values, dtype=np.float64)
+        present = ~np.isnan(values)
+        sums = np.bincount(inverse, weights=np.where(present, values, 0.0))
+        counts = np.bincount(inverse, weights=present.astype(np.float64))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            resampled[field] = sums / counts  # 0/0 -> NaN for buckets with no data
+
+    return dates[first], resampled
+
+
+def _best_in_buckets(x, y, bucket, starts, anchor_x, anchor_y, next_x, next_y) -> np.ndarray:
+    """Per bucket, the index of the point making the largest triangle with its anchor and the next bucket's average"""
+    areas = np.abs(
+        (anchor_x[bucket] - next_x[bucket]) * (y - anchor_y[bucket])
+        - (anchor_x[bucket] - x) * (next_y[bucket] - anchor_y[bucket])
+    )
+    is_best = areas == np.maximum.reduceat(areas, starts)[bucket]
+    # First maximum of each bucket, as np.argmax would pick
+    best = np.flatnonzero(is_best)
+    _, first = np.unique(bucket[best], return_index=True)
+    return best[first]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the Largest-Triangle-Three-Buckets downsample of (x, y) to `threshold` points.
+
+    Classic LTTB scores each bucket against the point picked in the previous one, which
+    needs a Python loop over the buckets. Here all buckets are scored at once, twice:
+    first against the previous bucket's average, then against the point that pass
+    picked in the previous bucket. Peaks and troughs survive the same way.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if np.isnan(y).any():
+        # Gaps shouldn't decide which points survive: fill them by interpolation
+        present = ~np.isnan(y)
+        y = np.interp(x, x[present], y[present]) if present.any() else np.zeros(n)
+
+    # First and last points are always kept, points 1..n-2 are split into threshold - 2
+    # buckets (each non-empty, since threshold < n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    starts = edges[:-1] - 1  # offsets into the inner points
+    counts = np.diff(edges)
+    inner_x, inner_y = x[1:-1], y[1:-1]
+    bucket = np.repeat(np.arange(threshold - 2), counts)
+
+    mean_x = np.add.reduceat(inner_x, starts) / counts
+    mean_y = np.add.reduceat(inner_y, starts) / counts
+    # Third triangle vertex: the next bucket's average, or the last point for the last bucket
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    # Pass 1 anchors on the previous bucket's average, pass 2 on pass 1's pick there
+    anchor_x = np.insert(mean_x[:-1], 0, x[0])
+    anchor_y = np.insert(mean_y[:-1], 0, y[0])
+    picked = _best_in_buckets(inner_x, inner_y, bucket, starts, anchor_x, anchor_y, next_x, next_y)
+    anchor_x = np.insert(inner_x[picked[:-1]], 0, x[0])
+    anchor_y = np.insert(inner_y[picked[:-1]], 0, y[0])
+    picked = _best_in_buckets(inner_x, inner_y, bucket, starts, anchor_x, anchor_y, next_x, next_y)
+
+    return np.concatenate(([0], picked + 1, [n - 1]))
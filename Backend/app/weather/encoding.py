@@ -0,0 +1,113 @@
+"""
+Response encodings for station series, negotiated from the Accept header.
+
+- application/json: one dict per day (the original format)
+- application/vnd.weatherjyjam.columns+json: one array per field, dates as a
+  start date plus a fixed step, or as epoch-day integers when irregular
+- application/x-msgpack: the columnar document as MessagePack (needs `msgpack`)
+- application/vnd.apache.arrow.stream: an Arrow IPC stream (needs `pyarrow`)
+
+The binary encodings are optional dependencies and are only offered when importable.
+"""
+import io
+import json
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.weather.store import WeatherSeries
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # optional dependency
+    pyarrow = None
+
+
+JSON_ROWS = 'application/json'
+JSON_COLUMNS = 'application/vnd.weatherjyjam.columns+json'
+MSGPACK = 'application/x-msgpack'
+ARROW = 'application/vnd.apache.arrow.stream'
+
+# ?format= shortcuts for clients that can't set Accept (e.g. a browser tab)
+FORMAT_ALIASES = {
+    'rows': JSON_ROWS,
+    'json': JSON_ROWS,
+    'columns': JSON_COLUMNS,
+    'msgpack': MSGPACK,
+    'arrow': ARROW,
+}
+
+
+def available_mimetypes() -> list:
+    mimetypes = [JSON_ROWS, JSON_COLUMNS]
+    if msgpack is not None:
+        mimetypes.append(MSGPACK)
+    if pyarrow is not None:
+        mimetypes.append(ARROW)
+    return mimetypes
+
+
+def negotiate(request) -> Optional[str]:
+    """Pick a series encoding from ?format= or Accept, None if nothing acceptable is available"""
+    available = available_mimetypes()
+    requested = request.args.get('format')
+    if requested:
+        mimetype = FORMAT_ALIASES.get(requested)
+        return mimetype if mimetype in available else None
+    if not request.accept_mimetypes:
+        return JSON_ROWS
+    return request.accept_mimetypes.best_match(available)
+
+
+def to_columns(series: WeatherSeries) -> dict:
+    """Column-oriented document: field names once, one value array per field"""
+    days = series.dates.astype('datetime64[D]').astype(np.int64)
+    steps = np.diff(days)
+    regular = len(days) > 0 and (len(steps) == 0 or bool((steps == steps[0]).all()))
+
+    document = {
+        'station_name': series.station_name,
+        'length': len(days),
+        'start': str(series.dates[0].astype('datetime64[D]')) if len(days) else None,
+        # Regular series (daily, weekly) only need start + step; irregular ones carry epoch days
+        'step_days': (int(steps[0]) if len(steps) else 1) if regular else None,
+        'dates': None if regular else days.tolist(),
+        'fields': list(series.columns),
+        'columns': {field: series.column_values(field) for field in series.columns},
+    }
+    return document
+
+
+def to_arrow(series: WeatherSeries) -> bytes:
+    """Arrow IPC stream with a date32 column plus one float32 column per field (NaN -> null)"""
+    arrays = [pyarrow.array(np.asarray(series.dates, dtype='datetime64[D]'))]
+    names = ['Date']
+    for field, values in series.columns.items():
+        values = np.asarray(values, dtype=np.float32)
+        arrays.append(pyarrow.array(values, mask=np.isnan(values)))
+        names.append(field)
+
+    table = pyarrow.Table.from_arrays(arrays, names=names)
+    table = table.replace_schema_metadata({'station_name': series.station_name})
+
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def encode_series(series: WeatherSeries, mimetype: str) -> Tuple[bytes, str]:
+    """Encode a series as (body, mimetype)"""
+    if mimetype == JSON_COLUMNS:
+        return json.dumps(to_columns(series)).encode('utf-8'), mimetype
+    if mimetype == MSGPACK:
+        return msgpack.packb(to_columns(series)), mimetype
+    if mimetype == ARROW:
+        return to_arrow(series), mimetype
+    return json.dumps(series.to_rows()).encode('utf-8'), JSON_ROWS
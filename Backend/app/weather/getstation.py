@@ -1,51 +1,65 @@
 import csv
-import math
 import os
-from flask_sqlalchemy import SQLAlchemy
-from typing import Tuple
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+from app.weather.spatial import EARTH_RADIUS_KM, StationIndex
 
 def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    # Calculate the great-circle distance between two points on the Earth
-    R = 6371  # Earth radius in kilometers
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
-    return 2 * R * math.asin(math.sqrt(a))
-
-def get_nearest_station_from_db(lat: float, lon: float, db: SQLAlchemy) -> str:
-    min_dist = float('inf')
-    nearest_station = None
+    # Calculate the great-circle distance between two points on the Earth (km)
+    return float(haversine_np(lat1, lon1, lat2, lon2))
+
+def haversine_np(lat1, lon1, lat2, lon2) -> np.ndarray:
+    # Vectorized haversine, arguments broadcast against each other (degrees in, km out)
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = np.radians(np.subtract(lat2, lat1))
+    dlambda = np.radians(np.subtract(lon2, lon1))
+    a = np.sin(dphi/2)**2 + np.cos(phi1)*np.cos(phi2)*np.sin(dlambda/2)**2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def nearest_stations_batch(index: StationIndex, lats, lons, k: int = 1) -> List[List[dict]]:
+    # Resolve many points in one pass: (points x stations) distance matrix, then top-k per row
+    if not len(index) or k < 1:
+        return [[] for _ in range(len(lats))]
+
+    station_lats, station_lons = index.coordinates()
+    dist = haversine_np(
+        np.asarray(lats, dtype=np.float64)[:, None],
+        np.asarray(lons, dtype=np.float64)[:, None],
+        station_lats[None, :],
+        station_lons[None, :],
+    )
+
+    k = min(k, dist.shape[1])
+    if k < dist.shape[1]:
+        top = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    else:
+        top = np.broadcast_to(np.arange(k), (dist.shape[0], k))
+    top_dist = np.take_along_axis(dist, top, axis=1)
+    order = np.argsort(top_dist, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    top_dist = np.take_along_axis(top_dist, order, axis=1)
+
+    results = []
+    for row_idx, row_dist in zip(top.tolist(), top_dist.tolist()):
+        results.append([
+            {**index.stations[i], 'distance': d}
+            for i, d in zip(row_idx, row_dist)
+        ])
+    return results
+
+@lru_cache(maxsize=8)
+def load_stations_csv_index(stations_csv: str) -> StationIndex:
+    # Parse stations.csv once per path, later lookups reuse the KD-tree
     with open(stations_csv, newline='', encoding='utf-8') as csvfile:
         reader = csv.DictReader(csvfile)
-        for row in reader:
-            try:
-                station_lat = float(row['latitude'])
-                station_lon = float(row['longitude'])
-                dist = haversine(lat, lon, station_lat, station_lon)
-                if dist < min_dist:
-                    min_dist = dist
-                    nearest_station = row['station_name']
-            except (KeyError, ValueError):
-                continue
-    return nearest_station
+        return StationIndex(list(reader), lat_key='latitude', lon_key='longitude')
 
 def get_nearest_station(lat: float, lon: float, stations_csv: str = 'stations.csv') -> str:
-    min_dist = float('inf')
-    nearest_station = None
-    with open(stations_csv, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            try:
-                station_lat = float(row['latitude'])
-                station_lon = float(row['longitude'])
-                dist = haversine(lat, lon, station_lat, station_lon)
-                if dist < min_dist:
-                    min_dist = dist
-                    nearest_station = row['station_name']
-            except (KeyError, ValueError):
-                continue
-    return nearest_station
+    nearest = load_stations_csv_index(stations_csv).nearest(lat, lon, k=1)
+    return nearest[0]['station_name'] if nearest else None
 
 # To access stations.csv reliably, use an absolute path relative to this script's location
 def get_stations_csv_path(filename='stations.csv'):
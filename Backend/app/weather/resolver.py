@@ -0,0 +1,93 @@
+"""
+Canonical station lookup.
+
+Requests name stations loosely ("melbourne airport", "HOBART", "alice springs").
+The resolver maps a requested name to one (station_id, Station Name) pair from
+a station catalog, once per distinct name, so weather queries can filter on the
+integer `station_id` and hit the (station_id, Date) index instead of matching
+strings against `weather_data`.
+
+The catalog is whatever WeatherService reads from: the `stations` rows, or the
+station names of the columnar store / Parquet export (no station_id, works
+without a database).
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional, Sequence, Union
+
+
+class Station(NamedTuple):
+    station_id: Optional[int]  # None when the catalog only knows the name
+    name: str
+
+
+class StationResolver:
+    """
+    Requested name -> canonical Station: exact (case-insensitive) name, else the one
+    station whose name contains it. Ambiguous or unknown names resolve to None.
+    """
+
+    def __init__(self, catalog: Callable[[], Sequence[Union[dict, str]]], cache_size: int = 1024):
+        self.catalog = catalog  # returns the same sequence object until the catalog changes
+        self.cache_size = cache_size
+        self._catalog = None
+        self._by_name = {}
+        self._cache: "OrderedDict[str, Optional[Station]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _station(entry: Union[dict, str]) -> Optional[Station]:
+        if isinstance(entry, str):
+            return Station(None, entry) if entry else None
+        if not entry.get('Station Name'):
+            return None
+        station_id = entry.get('station_id')
+        return Station(int(station_id) if station_id is not None else None, entry['Station Name'])
+
+    def _stations_by_name(self) -> dict:
+        # Rebuilt whenever the catalog has been reloaded
+        catalog = self.catalog()
+        if catalog is not self._catalog:
+            by_name = {}
+            for entry in catalog:
+                station = self._station(entry)
+                if station is not None:
+                    by_name[station.name.upper()] = station
+            with self._lock:
+                self._by_name, self._catalog = by_name, catalog
+                self._cache.clear()
+        return self._by_name
+
+    def resolve(self, name: str) -> Optional[Station]:
+        """Canonical station for a requested name, None if nothing (or more than one station) matches"""
+        key = ' '.join((name or '').upper().split())
+        if not key:
+            return None
+        try:
+            by_name = self._stations_by_name()
+        except Exception as e:
+            # No catalog (e.g. no database): unresolved, callers fall back to the name as given
+            print(f"⚠️  Station catalog unavailable: {e}")
+            return None
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        station = by_name.get(key)
+        if station is None:
+            # The old LIKE '%name%' match, but only when it identifies a single station
+            matches = [s for upper, s in by_name.items() if key in upper]
+            station = matches[0] if len(matches) == 1 else None
+
+        with self._lock:
+            self._cache[key] = station
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return station
+
+    def reset(self) -> None:
+        with self._lock:
+            self._catalog = None
+            self._cache.clear()
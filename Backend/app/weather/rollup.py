@@ -0,0 +1,155 @@
+"""
+Materialized monthly summaries of `weather_data`.
+
+`weather_monthly` holds one row per station and calendar month with the same
+averages the avg_ endpoint used to compute on every request. It is built in
+full once (`flask weather refresh-rollups`, or by gunicorn's master at startup),
+then refreshed incrementally from the latest rolled-up month so new daily rows
+only cost a re-aggregation of the months they land in. Until it is built the
+avg_ endpoint aggregates `weather_data` directly (MONTHLY_AGGREGATE).
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Column, Date, Float, Integer, String, delete, func, select
+from sqlalchemy import exc as sqlalchemy_exc
+from sqlalchemy import text as sqlalchemy_text
+
+from app.database import db
+
+
+weather_monthly = db.Table(
+    "weather_monthly",
+    Column("station_name", String(30), primary_key=True),
+    Column("year", Integer, primary_key=True),
+    Column("month", String(3), primary_key=True),
+    Column("first_date", Date, nullable=False, index=True),
+    Column("last_date", Date, nullable=False),
+    Column("day_count", Integer, nullable=False),
+    Column("avg_rainfall", Float),
+    Column("avg_temperature", Float),
+    Column("avg_relative_humidity", Float),
+    Column("avg_wind_speed", Float),
+)
+
+
+# Same averages as the original avg_ query, grouped per station and month
+ROLLUP_INSERT = """
+    INSERT INTO weather_monthly (
+        station_name, year, month, first_date, last_date, day_count,
+        avg_rainfall, avg_temperature, avg_relative_humidity, avg_wind_speed
+    )
+    SELECT
+        w.`Station Name`,
+        d.Year,
+        d.Month,
+        MIN(w.Date),
+        MAX(w.Date),
+        COUNT(*),
+        AVG(w.`Rain 0900-0900 (mm)`),
+        AVG((w.`Maximum Temperature (°C)` + w.`Minimum Temperature (°C)`) / 2),
+        AVG((w.`Maximum Relative Humidity (%)` + w.`Minimum Relative Humidity (%)`) / 2),
+        AVG(w.`Average 10m Wind Speed (m/sec)`)
+    FROM
+        weather_data w
+    JOIN
+        Dates d ON w.Date = d.Date
+    {where}
+    GROUP BY
+        w.`Station Name`,
+        d.Year,
+        d.Month
+"""
+
+
+# Live fallback while weather_monthly is empty: same averages for one station
+MONTHLY_AGGREGATE = """
+    SELECT
+        w.`Station Name` AS `Station Name`,
+        MIN(w.Date) AS Date,
+        AVG(w.`Rain 0900-0900 (mm)`) AS Avg_Rainfall,
+        AVG((w.`Maximum Temperature (°C)` + w.`Minimum Temperature (°C)`) / 2) AS Avg_Temperature,
+        AVG((w.`Maximum Relative Humidity (%)` + w.`Minimum Relative Humidity (%)`) / 2) AS Avg_Relative_Humidity,
+        AVG(w.`Average 10m Wind Speed (m/sec)`) AS Avg_Wind_Speed
+    FROM
+        weather_data w
+    JOIN
+        Dates d ON w.Date = d.Date
+    WHERE
+        w.`Station Name` = :station_name
+    GROUP BY
+        w.`Station Name`,
+        d.Year,
+        d.Month
+    ORDER BY
+        Date
+"""
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def refresh_monthly_rollups(engine, since: Optional[date] = None, full: bool = False) -> int:
+    """
+    Rebuild monthly rollups from `since` (default: the latest rolled-up month) onwards.
+    An empty table or full=True rebuilds everything. Returns the number of months written.
+
+    The default watermark is the latest month of any station, so rows backfilled into
+    earlier months (or a new station's history) need an explicit `since` or full=True.
+    """
+    with engine.begin() as conn:
+        cutoff = None
+        if not full:
+            watermark = since or _as_date(
+                conn.execute(select(func.max(weather_monthly.c.last_date))).scalar()
+            )
+            if watermark is not None:
+                # Re-aggregate the whole month the watermark falls in, it may have been partial
+                cutoff = watermark.replace(day=1)
+
+        if cutoff is None:
+            conn.execute(delete(weather_monthly))
+            result = conn.execute(sqlalchemy_text(ROLLUP_INSERT.format(where="")))
+        else:
+            conn.execute(delete(weather_monthly).where(weather_monthly.c.first_date >= cutoff))
+            result = conn.execute(
+                sqlalchemy_text(ROLLUP_INSERT.format(where="WHERE w.Date >= :cutoff")),
+                {"cutoff": cutoff.isoformat()},
+            )
+
+    return result.rowcount
+
+
+def rollups_exist(engine) -> bool:
+    """Whether the rollup table exists and has been populated (a read replica may not have it yet)"""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(weather_monthly.c.station_name).limit(1)).first() is not None
+    except sqlalchemy_exc.DatabaseError:
+        return False
+
+
+def monthly_aggregate_query(station_name: str):
+    """Compute a station's monthly averages from weather_data (rollups not built yet)"""
+    return sqlalchemy_text(MONTHLY_AGGREGATE).bindparams(station_name=station_name)
+
+
+def monthly_rollup_query(station_name: str):
+    """Select a station's monthly averages with the avg_ endpoint's column names"""
+    t = weather_monthly
+    match = t.c.station_name == station_name
+    return (
+        select(
+            t.c.station_name.label("Station Name"),
+            t.c.first_date.label("Date"),
+            t.c.avg_rainfall.label("Avg_Rainfall"),
+            t.c.avg_temperature.label("Avg_Temperature"),
+            t.c.avg_relative_humidity.label("Avg_Relative_Humidity"),
+            t.c.avg_wind_speed.label("Avg_Wind_Speed"),
+        )
+        .where(match)
+        .order_by(t.c.first_date, t.c.station_name)
+    )
@@ -1,42 +1,263 @@
-from typing import List, Optional
+import os
+import threading
+import time
+from datetime import date
+from typing import Iterator, List, Optional, Tuple
 
 from decimal import Decimal
 
+from flask import current_app
+from sqlalchemy import inspect as sqlalchemy_inspect
 from sqlalchemy import text as sqlalchemy_text
-from app.database import db
+from app.database import db, read_engine
+from app.weather import analytics
+from app.weather.analytics import WeatherAnalytics, export_parquet
+from app.weather.cache import response_cache
+from app.weather.getstation import nearest_stations_batch
+from app.weather.resolver import Station, StationResolver
+from app.weather.rollup import monthly_aggregate_query, monthly_rollup_query, refresh_monthly_rollups, rollups_exist
+from app.weather.spatial import LazyStationIndex, StationIndex
+from app.weather.store import WeatherSeries, WeatherStore, build_store
+
+
+def clean_row(row) -> dict:
+    """Make a result row JSON-ready: Decimal -> float, date -> ISO string"""
+    return {
+        k: float(v) if isinstance(v, Decimal) else v.isoformat() if isinstance(v, date) else v
+        for k, v in row.items()
+    }
         
 
 class WeatherService:
     """Weather service layer for business logic"""
+
+    STORE_CHECK_INTERVAL = 5.0  # seconds between checks for a rebuilt columnar store
+
+    # Keyset continuation on the (Station Name, Date) primary key
+    AFTER_KEY_FILTER = """
+            WHERE
+                `Station Name` > :after_station
+                OR (`Station Name` = :after_station AND Date > :after_date)
+    """
+
+    def __init__(self):
+        self.station_index = LazyStationIndex(lambda: StationIndex.from_engine(read_engine()))
+        self.resolver = StationResolver(self.station_catalog)
+        self._has_station_ids: Optional[bool] = None
+        self._rollups_ready = False
+        self._rollups_checked_at = float("-inf")
+        self._rollup_lock = threading.Lock()
+        self._store: Optional[WeatherStore] = None
+        self._store_checked_at = float("-inf")
+        self._store_lock = threading.Lock()
+        self._analytics: Optional[WeatherAnalytics] = None
+        self._analytics_checked_at = float("-inf")
+        self._analytics_lock = threading.Lock()
+
+    def load_station_index(self) -> int:
+        """Build (or rebuild) the in-memory station index, returns station count"""
+        self.station_index.reset()
+        self.resolver.reset()
+        self._has_station_ids = None
+        return len(self.station_index.get())
+
+    def station_catalog(self) -> list:
+        """
+        Stations the resolver matches names against: the columnar store's or Parquet export's
+        station names when one is present (no database needed), else the `stations` rows
+        """
+        store = self.get_store()
+        if store is not None:
+            return store.station_names
+        parquet = self.get_analytics()
+        if parquet is not None:
+            return parquet.station_names()
+        return self.station_index.get().stations
+
+    def resolve_station(self, station_name: str) -> Optional[Station]:
+        """
+        Canonical (station_id, name) for a requested station name. Names the catalog can't
+        resolve (unknown, ambiguous, missing from `stations`, no catalog) are kept as given,
+        without a station_id, and matched exactly against `Station Name`
+        """
+        station = self.resolver.resolve(station_name)
+        if station is not None:
+            return station
+        name = ' '.join((station_name or '').split())
+        return Station(None, name) if name else None
+
+    def has_station_ids(self) -> bool:
+        """Whether weather_data has the station_id column (Database/SQL_Queries/*_addWeatherStationId)"""
+        if self._has_station_ids is None:
+            columns = sqlalchemy_inspect(read_engine()).get_columns("weather_data")
+            self._has_station_ids = any(column["name"] == "station_id" for column in columns)
+        return self._has_station_ids
     
-    def get_weather_by_station(self, station_name: str) -> dict:
-        """Return weather data for a station as a list for charting"""
+    def get_weather_by_station(
+        self,
+        station_name: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        resolution: str = "daily",
+        max_points: Optional[int] = None,
+    ) -> dict:
+        """Return weather data for a station as a list for charting (see get_chart_series)"""
+
+        series = self.get_chart_series(station_name, start, end, resolution, max_points)
+        if series is None:
+            return []
+
+        cleaned = series.to_rows()
+
+        if cleaned:
+            print("First cleaned row:", cleaned[0])
+
+        return cleaned
+
+    def get_chart_series(
+        self,
+        station_name: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        resolution: str = "daily",
+        max_points: Optional[int] = None,
+    ) -> Optional[WeatherSeries]:
+        """
+        Station history optionally limited to [start, end], averaged to
+        weekly/monthly buckets, and LTTB-downsampled to at most max_points rows.
+        """
 
         print(f"Searching for station: '{station_name}'")
 
-        query = """
+        series = self.get_weather_series(station_name, start=start, end=end)
+        if series is None:
+            return None
+
+        series = series.resample(resolution)
+        # Already few enough points after bucketing (e.g. monthly): nothing to downsample
+        if max_points and len(series) > max_points:
+            series = series.downsample(max_points)
+        return series
+
+    def get_weather_series(self, station_name: str, start: Optional[date] = None, end: Optional[date] = None) -> Optional[WeatherSeries]:
+        """Daily history for a station, from the columnar store or Parquet export when built, else from weather_data"""
+        station = self.resolve_station(station_name)
+        if station is None:
+            return None
+
+        store = self.get_store()
+        if store is not None:
+            series = store.series(station.name)
+            return series.between(start, end) if series is not None else None
+
+        parquet = self.get_analytics()
+        if parquet is not None:
+            return parquet.series(station.name, start, end)
+
+        # (station_id, Date) index once migrated, else the (Station Name, Date) primary key
+        if station.station_id is not None and self.has_station_ids():
+            match, params = "station_id = :station_id", {"station_id": station.station_id}
+        else:
+            match, params = "`Station Name` = :station_name", {"station_name": station.name}
+        query = f"""
             SELECT
                 *
             FROM
                 weather_data
             WHERE
-            `Station Name` = :station_name
+            {match}
+            {"AND Date >= :start" if start else ""}
+            {"AND Date <= :end" if end else ""}
             ORDER BY
                 Date;
         """
+        if start:
+            params["start"] = start.isoformat()
+        if end:
+            params["end"] = end.isoformat()
 
-        def clean_row(row):
-            return {
-                k: float(v) if isinstance(v, Decimal) else v
-                for k, v in row.items()
-            }
+        with read_engine().connect() as conn:
+            result = conn.execute(sqlalchemy_text(query), params)
+            rows = result.mappings().all()
 
-        with db.engine.connect() as conn:
-            result = conn.execute(sqlalchemy_text(query), {"station_name": f"%{station_name}%"})
-        
-        
-        rows = result.mappings().all()  # <--- use mappings()
+        return WeatherSeries.from_rows(station.name, rows) if rows else None
+
+    def get_store(self) -> Optional[WeatherStore]:
+        """Open the columnar store if one has been built, reopening it after a rebuild"""
+        now = time.monotonic()
+        if now - self._store_checked_at < self.STORE_CHECK_INTERVAL:
+            return self._store
+
+        with self._store_lock:
+            self._store_checked_at = now
+            if self._store is not None and not self._store.is_stale():
+                return self._store
+
+            directory = self.store_directory()
+            self._store = WeatherStore(directory) if WeatherStore.exists(directory) else None
+        return self._store
+
+    def store_directory(self) -> str:
+        return os.getenv("WEATHER_STORE_DIR") or os.path.join(current_app.instance_path, "weather_store")
+
+    def build_store(self) -> int:
+        """Export weather_data into the columnar store, returns the number of rows written"""
+        count = build_store(read_engine(), self.store_directory())
+        with self._store_lock:
+            self._store_checked_at = 0.0
+        response_cache.invalidate()
+        return count
+    
+    def get_analytics(self) -> Optional[WeatherAnalytics]:
+        """DuckDB view over the Parquet export if duckdb is installed and an export exists"""
+        if not analytics.available():
+            return None
+        now = time.monotonic()
+        if now - self._analytics_checked_at < self.STORE_CHECK_INTERVAL:
+            return self._analytics
+
+        with self._analytics_lock:
+            self._analytics_checked_at = now
+            if self._analytics is not None and not self._analytics.is_stale():
+                return self._analytics
+
+            path = self.parquet_path()
+            self._analytics = WeatherAnalytics(path) if WeatherAnalytics.exists(path) else None
+        return self._analytics
+
+    def parquet_path(self) -> str:
+        return os.getenv("WEATHER_PARQUET_PATH") or os.path.join(current_app.instance_path, "weather_data.parquet")
 
+    def export_parquet(self) -> int:
+        """Export weather_data to Parquet for the DuckDB analytics backend, returns the row count"""
+        count = export_parquet(read_engine(), self.parquet_path())
+        with self._analytics_lock:
+            self._analytics_checked_at = 0.0
+        response_cache.invalidate()
+        return count
+    
+    def get_avg_weather_by_station(self, station_name: str) -> dict:
+        """Return monthly averages for a station as a list for charting (DuckDB over Parquet, else weather_monthly, else weather_data)"""
+
+        print(f"Searching for station: '{station_name}'")
+
+        station = self.resolve_station(station_name)
+        if station is None:
+            return []
+
+        parquet = self.get_analytics()
+        if parquet is not None:
+            cleaned = parquet.monthly_averages(station.name)
+            if cleaned:
+                print("First cleaned row:", cleaned[0])
+            return cleaned
+
+        with read_engine().connect() as conn:
+            if self.rollups_ready():
+                # The canonical name hits the rollup primary key
+                rows = conn.execute(monthly_rollup_query(station.name)).mappings().all()
+            else:
+                rows = conn.execute(monthly_aggregate_query(station.name)).mappings().all()
 
         cleaned = [clean_row(row) for row in rows]
 
@@ -44,90 +265,113 @@ class WeatherService:
             print("First cleaned row:", cleaned[0])
 
         return cleaned
-    
-    def get_avg_weather_by_station(self, station_name: str) -> dict:
-        """Return weather data for a station as a list for charting"""
 
-        print(f"Searching for station: '{station_name}'")
+    def rollups_ready(self) -> bool:
+        """
+        Whether weather_monthly is populated where avg_ reads it, on the read engine
+        (rechecked every STORE_CHECK_INTERVAL until it is, e.g. once replication catches up)
+        """
+        if self._rollups_ready:
+            return True
+        now = time.monotonic()
+        if now - self._rollups_checked_at >= self.STORE_CHECK_INTERVAL:
+            self._rollups_checked_at = now
+            self._rollups_ready = rollups_exist(read_engine())
+        return self._rollups_ready
+
+    def build_monthly_rollups(self) -> int:
+        """
+        Build the rollups if the table is still empty, returns the months written (0 if already built).
+        Runs from the CLI or gunicorn's master before workers start, never on the request path:
+        concurrent full rebuilds from several workers would fight over weather_monthly.
+        """
+        with self._rollup_lock:
+            if rollups_exist(db.engine):
+                return 0
+            count = refresh_monthly_rollups(db.engine, full=True)
+        # Built on the primary: rollups_ready() picks them up once the read engine has them
+        self._rollups_checked_at = float("-inf")
+        response_cache.invalidate()
+        return count
 
-        query = """
+    def refresh_monthly_rollups(self, since: Optional[date] = None, full: bool = False) -> int:
+        """Incrementally refresh monthly rollups after new daily rows are loaded"""
+        with self._rollup_lock:
+            count = refresh_monthly_rollups(db.engine, since=since, full=full)
+        self._rollups_checked_at = float("-inf")
+        response_cache.invalidate()
+        return count
+
+    def get_all_weather_stations(self, limit: int = 1000, after: Optional[Tuple[str, str]] = None) -> Tuple[List[dict], Optional[Tuple[str, str]]]:
+        """
+        Get one keyset page of weather_data ordered by (Station Name, Date).
+        Returns the rows and the key to pass as `after` for the next page (None on the last page).
+        """
+        query = f"""
             SELECT
-                w.`Station Name`,
-                DATE_FORMAT(MIN(w.Date), '%Y-%m-%d') AS Date,
-                AVG(w.`Rain 0900-0900 (mm)`) AS Avg_Rainfall,
-                AVG((w.`Maximum Temperature (°C)` + w.`Minimum Temperature (°C)`) / 2) AS Avg_Temperature,
-                AVG((w.`Maximum Relative Humidity (%)` + w.`Minimum Relative Humidity (%)`) / 2) AS Avg_Relative_Humidity,
-                AVG(w.`Average 10m Wind Speed (m/sec)`) AS Avg_Wind_Speed
+                *
             FROM
-                weather_data w
-            JOIN
-                Dates d ON w.Date = d.Date
-            WHERE
-            `Station Name` LIKE :station_name
-            GROUP BY
-                d.Year,
-                d.Month,
-                w.`Station Name`
+                weather_data
+            {self.AFTER_KEY_FILTER if after else ""}
             ORDER BY
-                d.Year,
-                d.Month
-                ASC;
+                `Station Name`,
+                Date
+            LIMIT :limit
         """
+        params = {"limit": limit}
+        if after:
+            params.update(after_station=after[0], after_date=after[1])
 
-        def clean_row(row):
-            return {
-                k: float(v) if isinstance(v, Decimal) else v
-                for k, v in row.items()
-            }
+        with read_engine().connect() as conn:
+            rows = conn.execute(sqlalchemy_text(query), params).mappings().all()
 
-        with db.engine.connect() as conn:
-            result = conn.execute(sqlalchemy_text(query), {"station_name": f"%{station_name}%"})
-        
-        
-        rows = result.mappings().all()  # <--- use mappings()
+        cleaned = [clean_row(row) for row in rows]
+        next_after = (cleaned[-1]["Station Name"], cleaned[-1]["Date"]) if len(cleaned) == limit else None
+        return cleaned, next_after
+
+    def stream_all_weather_stations(self, after: Optional[Tuple[str, str]] = None, chunk_rows: int = 1000) -> Iterator[dict]:
+        """Yield every weather_data row through a server-side cursor, memory stays flat"""
+        query = f"""
+            SELECT
+                *
+            FROM
+                weather_data
+            {self.AFTER_KEY_FILTER if after else ""}
+            ORDER BY
+                `Station Name`,
+                Date
+        """
+        params = {"after_station": after[0], "after_date": after[1]} if after else {}
 
+        with read_engine().connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(
+                sqlalchemy_text(query), params
+            )
+            for row in result.mappings():
+                yield clean_row(row)
 
-        cleaned = [clean_row(row) for row in rows]
+    def get_nearest_station(self, lat: float, lng: float) -> Optional[dict]:
+        """
+        Get the nearest weather station to a given latitude and longitude.
+        Distance is the great-circle distance in km.
+        """
+        stations = self.station_index.get().nearest(lat, lng, k=1)
+        return stations[0] if stations else None
 
-        if cleaned:
-            print("First cleaned row:", cleaned[0])
+    def get_nearest_stations(self, lat: float, lng: float, k: int = 5) -> List[dict]:
+        """Get the k nearest weather stations ordered by distance (km)"""
+        return self.station_index.get().nearest(lat, lng, k=k)
 
-        return cleaned
+    def get_stations_within(self, lat: float, lng: float, radius_km: float) -> List[dict]:
+        """Get all weather stations within radius_km ordered by distance (km)"""
+        return self.station_index.get().within(lat, lng, radius_km)
 
-    
-    def get_all_weather_stations(self) -> list[dict]:
-        """Get all weather stations"""
-        with db.engine.connect() as conn:
-            result = conn.execute(sqlalchemy_text(
-                "SELECT * FROM weather_data"
-            ))
-            rows = result.fetchall()
-        return [dict(r) for r in rows]
-
-
-    def get_nearest_station(self, lat: float, lng: float) -> dict:
-        """
-        Get the nearest weather station to a given latitude and longitude
-        using SQL to calculate the distance directly.
-        """
-        with db.engine.connect() as conn:
-            # Simple Euclidean approximation (works for small distances)
-            query = """
-                SELECT *,
-                    SQRT(POW(lat - :lat, 2) + POW(lon - :lng, 2)) AS distance
-                FROM stations
-                ORDER BY distance ASC
-                LIMIT 1
-            """
-            result = conn.execute(sqlalchemy_text(query), {"lat": lat, "lng": lng})
-            # result = conn.execute(sqlalchemy_text("SELECT `Station Name` FROM stations LIMIT 1"))
-            row = result.mappings().first()  # safer
-            if not row:
-                return None
-
-            # Convert Decimals to float
-            data = {k: float(v) if isinstance(v, Decimal) else v for k, v in row.items()}
-
-            return data
-            
-        return dict(row) if row else None
\ No newline at end of file
+    def get_nearest_stations_batch(self, points: List[tuple], k: int = 1) -> List[List[dict]]:
+        """Resolve the k nearest stations for many (lat, lng) points in one vectorized pass"""
+        lats = [lat for lat, _ in points]
+        lngs = [lng for _, lng in points]
+        return nearest_stations_batch(self.station_index.get(), lats, lngs, k=k)
+
+
+# Shared by the weather routes, the CLI and the AI search tools
+weather_service = WeatherService()
@@ -0,0 +1,197 @@
+"""
+In-memory spatial index over the weather station catalog.
+
+Stations are projected onto the unit sphere and stored in a KD-tree, so the
+straight-line (chord) distance between two points is monotonic with their
+great-circle distance. Queries therefore prune on chord distance and report
+the true haversine distance in kilometres.
+"""
+import heapq
+import math
+import threading
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text as sqlalchemy_text
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def to_unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    """Project a lat/lon pair (degrees) onto the unit sphere"""
+    phi, lam = math.radians(lat), math.radians(lon)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+
+def chord_to_km(chord: float) -> float:
+    """Convert a unit-sphere chord length to a great-circle distance in km"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def km_to_chord(distance_km: float) -> float:
+    """Convert a great-circle distance in km to a unit-sphere chord length"""
+    angle = min(math.pi, distance_km / EARTH_RADIUS_KM)
+    return 2 * math.sin(angle / 2)
+
+
+class _Node:
+    __slots__ = ("index", "axis", "left", "right")
+
+    def __init__(self, index: int, axis: int, left: "Optional[_Node]", right: "Optional[_Node]"):
+        self.index = index
+        self.axis = axis
+        self.left = left
+        self.right = right
+
+
+class StationIndex:
+    """KD-tree of stations answering nearest, k-nearest and radius queries"""
+
+    def __init__(self, stations: List[dict], lat_key: str = "lat", lon_key: str = "lon"):
+        self.stations: List[dict] = []
+        self.points: List[Tuple[float, float, float]] = []
+        self.latlons: List[Tuple[float, float]] = []
+
+        for station in stations:
+            try:
+                lat = float(station[lat_key])
+                lon = float(station[lon_key])
+            except (KeyError, TypeError, ValueError):
+                continue
+            self.stations.append(station)
+            self.points.append(to_unit_vector(lat, lon))
+            self.latlons.append((lat, lon))
+
+        self._root = self._build(list(range(len(self.points))), 0)
+        self._coordinates = None
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+    def coordinates(self):
+        """Station latitudes and longitudes (degrees) as NumPy arrays, for batch lookups"""
+        if self._coordinates is None:
+            import numpy as np
+
+            latlons = np.asarray(self.latlons, dtype=np.float64).reshape(-1, 2)
+            self._coordinates = (latlons[:, 0].copy(), latlons[:, 1].copy())
+        return self._coordinates
+
+    @classmethod
+    def from_engine(cls, engine) -> "StationIndex":
+        """Build the index from the `stations` table"""
+        with engine.connect() as conn:
+            result = conn.execute(sqlalchemy_text("SELECT * FROM stations"))
+            rows = result.mappings().all()
+
+        stations = [
+            {k: float(v) if isinstance(v, Decimal) else v for k, v in row.items()}
+            for row in rows
+        ]
+        return cls(stations)
+
+    def _build(self, indices: List[int], depth: int) -> Optional[_Node]:
+        if not indices:
+            return None
+
+        axis = depth % 3
+        indices.sort(key=lambda i: self.points[i][axis])
+        median = len(indices) // 2
+
+        return _Node(
+            index=indices[median],
+            axis=axis,
+            left=self._build(indices[:median], depth + 1),
+            right=self._build(indices[median + 1:], depth + 1),
+        )
+
+    def _result(self, index: int, chord_sq: float) -> dict:
+        data = dict(self.stations[index])
+        data["distance"] = chord_to_km(math.sqrt(chord_sq))
+        return data
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[dict]:
+        """Return the k nearest stations ordered by distance (km)"""
+        if k < 1 or self._root is None:
+            return []
+
+        target = to_unit_vector(lat, lon)
+        # Max-heap of (-chord_sq, index) holding the best k candidates so far
+        best: List[Tuple[float, int]] = []
+
+        def visit(node: Optional[_Node]) -> None:
+            if node is None:
+                return
+
+            point = self.points[node.index]
+            dist_sq = (
+                (point[0] - target[0]) ** 2
+                + (point[1] - target[1]) ** 2
+                + (point[2] - target[2]) ** 2
+            )
+            if len(best) < k:
+                heapq.heappush(best, (-dist_sq, node.index))
+            elif dist_sq < -best[0][0]:
+                heapq.heapreplace(best, (-dist_sq, node.index))
+
+            diff = target[node.axis] - point[node.axis]
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+            visit(near)
+            if len(best) < k or diff * diff < -best[0][0]:
+                visit(far)
+
+        visit(self._root)
+
+        return [self._result(index, -neg_sq) for neg_sq, index in sorted(best, reverse=True)]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[dict]:
+        """Return every station within radius_km ordered by distance (km)"""
+        if radius_km < 0 or self._root is None:
+            return []
+
+        target = to_unit_vector(lat, lon)
+        limit_sq = km_to_chord(radius_km) ** 2
+        found: List[Tuple[float, int]] = []
+
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            point = self.points[node.index]
+            dist_sq = (
+                (point[0] - target[0]) ** 2
+                + (point[1] - target[1]) ** 2
+                + (point[2] - target[2]) ** 2
+            )
+            if dist_sq <= limit_sq:
+                found.append((dist_sq, node.index))
+
+            diff = target[node.axis] - point[node.axis]
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+            if near is not None:
+                stack.append(near)
+            if far is not None and diff * diff <= limit_sq:
+                stack.append(far)
+
+        return [self._result(index, dist_sq) for dist_sq, index in sorted(found)]
+
+
+class LazyStationIndex:
+    """Builds a StationIndex on first use and shares it across threads"""
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._index: Optional[StationIndex] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> StationIndex:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._loader()
+        return self._index
+
+    def reset(self) -> None:
+        """Drop the cached index so the next query rebuilds it"""
+        with self._lock:
+            self._index = None
@@ -0,0 +1,240 @@
+"""
+Columnar, memory-mapped store of daily station history.
+
+`weather_data` is exported once into a directory of `.npy` files: one float32
+array per variable (NaN for missing readings), a shared datetime64 date axis
+and a per-station offset index. Rows are sorted by station then date, so a
+station's history is a contiguous slice of every array.
+
+Arrays are opened with `mmap_mode='r'`: reads are zero-copy slices, and every
+worker process maps the same files, sharing their pages through the OS page
+cache instead of each holding its own copy.
+"""
+import os
+import shutil
+import tempfile
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import text as sqlalchemy_text
+
+from app.weather.downsample import lttb, resample
+
+
+# weather_data column -> array file name
+STORE_FIELDS = {
+    'Rain 0900-0900 (mm)': 'rain_mm',
+    'Maximum Temperature (°C)': 'max_temp_c',
+    'Minimum Temperature (°C)': 'min_temp_c',
+    'Maximum Relative Humidity (%)': 'max_rh_pct',
+    'Minimum Relative Humidity (%)': 'min_rh_pct',
+    'Average 10m Wind Speed (m/sec)': 'wind_ms',
+}
+
+BUILD_CHUNK_ROWS = 50_000
+
+# Series whose shape decides which days survive LTTB downsampling
+DOWNSAMPLE_FIELD = 'Maximum Temperature (°C)'
+
+
+class WeatherSeries:
+    """A station's daily history as a date axis plus one array per variable"""
+
+    def __init__(self, station_name: str, dates: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.station_name = station_name
+        self.dates = dates
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @classmethod
+    def from_rows(cls, station_name: str, rows: List[dict]) -> "WeatherSeries":
+        """Build a series from weather_data row mappings (Decimal/None values)"""
+        dates = np.array([str(row['Date'])[:10] for row in rows], dtype='datetime64[D]')
+        columns = {
+            field: np.array(
+                [np.nan if row.get(field) is None else float(row[field]) for row in rows],
+                dtype=np.float64,
+            )
+            for field in STORE_FIELDS
+        }
+        return cls(station_name, dates, columns)
+
+    def between(self, start: Optional[date] = None, end: Optional[date] = None) -> "WeatherSeries":
+        """Days in [start, end] (inclusive), still zero-copy slices of the date-sorted arrays"""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left'))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, 'D'), side='right'))
+        return WeatherSeries(
+            self.station_name,
+            self.dates[lo:hi],
+            {field: values[lo:hi] for field, values in self.columns.items()},
+        )
+
+    def resample(self, resolution: str) -> "WeatherSeries":
+        """Weekly/monthly bucket averages (daily returns the series unchanged)"""
+        dates, columns = resample(self.dates, self.columns, resolution)
+        return WeatherSeries(self.station_name, dates, columns)
+
+    def downsample(self, max_points: int, field: str = DOWNSAMPLE_FIELD) -> "WeatherSeries":
+        """Keep at most max_points rows, chosen by LTTB on `field` so peaks survive"""
+        if len(self.dates) <= max_points:
+            return self
+        x = self.dates.astype('datetime64[D]').astype(np.int64)
+        keep = lttb(x, self.columns[field], max_points)
+        return WeatherSeries(
+            self.station_name,
+            self.dates[keep],
+            {name: values[keep] for name, values in self.columns.items()},
+        )
+
+    def column_values(self, field: str) -> list:
+        """Column as a JSON-ready list: float32 noise rounded away, NaN as None"""
+        values = np.round(self.columns[field].astype(np.float64), 4)
+        return [None if v != v else v for v in values.tolist()]
+
+    def to_rows(self) -> List[dict]:
+        """Per-day dicts shaped like weather_data rows"""
+        dates = np.datetime_as_string(self.dates, unit='D').tolist()
+        fields = list(self.columns)
+        values = [self.column_values(field) for field in fields]
+        return [
+            {'Station Name': self.station_name, 'Date': day, **dict(zip(fields, row))}
+            for day, *row in zip(dates, *values)
+        ]
+
+
+class WeatherStore:
+    """Read-only view over a store directory written by build_store()"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.dates = np.load(os.path.join(directory, 'dates.npy'), mmap_mode='r')
+        self.columns = {
+            field: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+            for field, name in STORE_FIELDS.items()
+        }
+
+        stations = np.load(os.path.join(directory, 'stations.npy')).tolist()
+        offsets = np.load(os.path.join(directory, 'offsets.npy')).tolist()
+        self.station_names: List[str] = stations
+        self.offsets = {
+            name: (offsets[i], offsets[i + 1]) for i, name in enumerate(stations)
+        }
+        self._inode = self._current_inode()
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return os.path.exists(os.path.join(directory, 'offsets.npy'))
+
+    def _current_inode(self) -> Optional[int]:
+        try:
+            return os.stat(os.path.join(self.directory, 'offsets.npy')).st_ino
+        except OSError:
+            return None
+
+    def is_stale(self) -> bool:
+        """True once the directory has been rebuilt (or removed) since this view was opened"""
+        return self._current_inode() != self._inode
+
+    def series(self, station_name: str) -> Optional[WeatherSeries]:
+        """Zero-copy slices of one station's history, or None if unknown"""
+        span = self.offsets.get(station_name)
+        if span is None:
+            return None
+        start, stop = span
+        return WeatherSeries(
+            station_name,
+            self.dates[start:stop],
+            {field: column[start:stop] for field, column in self.columns.items()},
+        )
+
+
+def build_store(engine, directory: str, chunk_rows: int = BUILD_CHUNK_ROWS) -> int:
+    """
+    Export weather_data into a columnar store at `directory`, returns the row count.
+    The store is written to a temporary directory and swapped in at the end, so
+    readers never see a half-written store.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.weather_store-', dir=parent)
+
+    select_columns = ', '.join(f'`{field}`' for field in STORE_FIELDS)
+    query = f"""
+        SELECT
+            `Station Name`,
+            Date,
+            {select_columns}
+        FROM
+            weather_data
+        ORDER BY
+            `Station Name`,
+            Date
+    """
+
+    try:
+        with engine.connect() as conn:
+            total = conn.execute(sqlalchemy_text("SELECT COUNT(*) FROM weather_data")).scalar() or 0
+            if not total:
+                raise ValueError("weather_data is empty, nothing to export")
+
+            dates = np.lib.format.open_memmap(
+                os.path.join(tmp_dir, 'dates.npy'), mode='w+', dtype='datetime64[D]', shape=(total,)
+            )
+            columns = [
+                np.lib.format.open_memmap(
+                    os.path.join(tmp_dir, f'{name}.npy'), mode='w+', dtype=np.float32, shape=(total,)
+                )
+                for name in STORE_FIELDS.values()
+            ]
+
+            stations: List[str] = []
+            offsets: List[int] = []
+            position = 0
+
+            # Server-side cursor: rows arrive in chunks instead of one fetchall()
+            result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(
+                sqlalchemy_text(query)
+            )
+            for chunk in result.partitions(chunk_rows):
+                chunk = chunk[: total - position]  # rows inserted after COUNT(*) wait for the next build
+                if not chunk:
+                    break
+                end = position + len(chunk)
+
+                for i, row in enumerate(chunk):
+                    if not stations or row[0] != stations[-1]:
+                        stations.append(row[0])
+                        offsets.append(position + i)
+
+                dates[position:end] = np.array([str(row[1])[:10] for row in chunk], dtype='datetime64[D]')
+                for col_idx, column in enumerate(columns, start=2):
+                    column[position:end] = np.array(
+                        [np.nan if row[col_idx] is None else float(row[col_idx]) for row in chunk],
+                        dtype=np.float32,
+                    )
+                position = end
+
+        offsets.append(position)
+        for array in (dates, *columns):
+            array.flush()
+        del dates, columns
+
+        np.save(os.path.join(tmp_dir, 'stations.npy'), np.array(stations, dtype=str))
+        np.save(os.path.join(tmp_dir, 'offsets.npy'), np.array(offsets, dtype=np.int64))
+
+        # Swap the new store in; processes still mapping the old files keep valid pages
+        if os.path.exists(directory):
+            old_dir = tempfile.mkdtemp(prefix='.weather_store-old-', dir=parent)
+            os.replace(directory, os.path.join(old_dir, 'store'))
+            os.replace(tmp_dir, directory)
+            shutil.rmtree(old_dir, ignore_errors=True)
+        else:
+            os.replace(tmp_dir, directory)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return position
@@ -0,0 +1,120 @@
+"""
+Login throughput, and read-path latency while logins are hammering the server.
+
+Measures the weather read endpoints alone, then again while --login-threads clients
+log in as fast as they can, and reports logins/s, how many were shed with 503
+(bcrypt pool saturated) and how much the read p95 moved:
+
+    python -m benchmarks.auth --stations 20 --years 3 --duration 10 --login-threads 8
+    BCRYPT_WORKERS=1 python -m benchmarks.auth --login-threads 16
+    python -m benchmarks.auth --base-url http://localhost:8000 --stations 50 --login-threads 16
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+
+from benchmarks.run import (
+    RequestsTransport, TestClientTransport, count_rows, create_benchmark_app, measure, print_header, print_row,
+)
+from benchmarks.seed import seed_database, station_names
+
+
+def read_cases(transport, names: list, rng: random.Random) -> dict:
+    def call(path):
+        status, payload = transport.request("GET", path)
+        if status != 200:
+            raise RuntimeError(f"GET {path} -> {status}: {payload}")
+        return count_rows(payload)
+
+    return {
+        "read.nearest": lambda: call(
+            f"/api/weather/nearest?lat={rng.uniform(-43.5, -10.5)}&lng={rng.uniform(113.5, 153.5)}"
+        ),
+        "read.avg": lambda: call(f"/api/weather/avg_{quote(rng.choice(names))}"),
+        "read.search": lambda: call(f"/api/search?q={quote(rng.choice(names)[:rng.randint(1, 8)])}"),
+    }
+
+
+def hammer_logins(transport, email: str, password: str, threads: int, stop: threading.Event) -> dict:
+    """Log in from `threads` clients until stop is set, counting outcomes"""
+    counts = {"ok": 0, "busy": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def worker():
+        while not stop.is_set():
+            status, _ = transport.request("POST", "/api/auth/login", json={"email": email, "password": password})
+            key = "ok" if status == 200 else "busy" if status == 503 else "failed"
+            with lock:
+                counts[key] += 1
+
+    workers = [threading.Thread(target=worker, daemon=True) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    counts["_threads"] = workers
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login throughput and read latency under auth load")
+    parser.add_argument("--stations", type=int, default=20)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of login load")
+    parser.add_argument("--login-threads", type=int, default=8)
+    parser.add_argument("--read-iterations", type=int, default=200)
+    parser.add_argument("--read-threads", type=int, default=2)
+    parser.add_argument("--base-url", help="Benchmark a running server over HTTP instead of in-process")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="weather-auth-bench-")
+    rng = random.Random(args.seed)
+    names = station_names(args.stations)
+
+    if args.base_url:
+        transport = RequestsTransport(args.base_url)
+    else:
+        db_path = os.path.join(workdir, "bench.db")
+        seed_database(db_path, args.stations, args.years)
+        transport = TestClientTransport(create_benchmark_app(db_path, workdir))
+
+    email, password = f"auth-{time.time_ns()}@example.com", "benchmark-password"
+    transport.request("POST", "/api/auth/register", json={"name": "Bench", "email": email, "password": password})
+
+    cases = read_cases(transport, names, rng)
+    print("Read path, idle:")
+    print_header()
+    idle = {}
+    for name, fn in cases.items():
+        idle[name] = measure(fn, args.read_iterations, concurrency=args.read_threads)
+        print_row(name, idle[name])
+
+    print(f"\nRead path, with {args.login_threads} clients logging in:")
+    stop = threading.Event()
+    start = time.perf_counter()
+    counts = hammer_logins(transport, email, password, args.login_threads, stop)
+    print_header()
+    loaded = {}
+    for name, fn in cases.items():
+        loaded[name] = measure(fn, args.read_iterations, concurrency=args.read_threads)
+        print_row(name, loaded[name])
+    # Keep the login load on for at least --duration to get a stable login rate
+    time.sleep(max(0.0, args.duration - (time.perf_counter() - start)))
+    stop.set()
+    for w in counts.pop("_threads"):
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    attempts = counts["ok"] + counts["busy"] + counts["failed"]
+    print(f"\nLogins: {counts['ok'] / elapsed:.1f}/s ok over {elapsed:.1f}s "
+          f"({attempts} attempts, {counts['busy']} shed with 503, {counts['failed']} failed)")
+    for name in cases:
+        before, after = idle[name]["p95_ms"], loaded[name]["p95_ms"]
+        print(f"{name:<28} p95 {before:.2f} ms -> {after:.2f} ms ({after / before - 1:+.0%})")
+
+
+if __name__ == "__main__":
+    main()
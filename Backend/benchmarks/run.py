@@ -0,0 +1,352 @@
+"""
+Endpoint and service benchmarks against a seeded local SQLite database.
+
+Builds the app with USE_CLOUD_SQL=false on a synthetic database (see
+benchmarks/seed.py), then times service methods and HTTP endpoints and
+reports p50/p95/p99 latency and rows/sec:
+
+    python -m benchmarks.run --stations 50 --years 10 --save benchmarks/results/baseline.json
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+To benchmark a running server instead (HTTP cases only), seed a database,
+start the server on it and point the suite at it:
+
+    python -m benchmarks.seed --db /tmp/bench.db --stations 50 --years 10
+    USE_CLOUD_SQL=false FLASK_DATABASE_PATH=/tmp/bench.db python server.py
+    python -m benchmarks.run --base-url http://localhost:2333 --stations 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from urllib.parse import quote
+
+import numpy as np
+
+from benchmarks.seed import seed_database, station_names
+
+
+def summarize(samples: list, rows: int, wall: float) -> dict:
+    ms = np.asarray(samples) * 1000
+    total = float(np.sum(samples))
+    return {
+        "iterations": len(samples),
+        "requests_per_sec": round(len(samples) / wall, 1) if wall else None,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "rows_per_sec": round(rows / total, 1) if total else None,
+    }
+
+
+def measure(fn: Callable[[], Optional[int]], iterations: int, warmup: int = 3, concurrency: int = 1) -> dict:
+    """
+    Time fn() `iterations` times, spread over `concurrency` threads;
+    fn returns the number of rows it produced
+    """
+    samples, rows = [], [0]
+    lock = threading.Lock()
+
+    def worker(count):
+        for _ in range(count):
+            start = time.perf_counter()
+            produced = fn()
+            elapsed = time.perf_counter() - start
+            with lock:
+                samples.append(elapsed)
+                rows[0] += produced or 0
+
+    shares = [iterations // concurrency + (i < iterations % concurrency) for i in range(concurrency)]
+    # The services print on every call, keep that out of the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(warmup):
+            fn()
+        start = time.perf_counter()
+        if concurrency == 1:
+            worker(iterations)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(worker, shares))
+        wall = time.perf_counter() - start
+    return summarize(samples, rows[0], wall)
+
+
+def count_rows(payload) -> int:
+    if isinstance(payload, list):
+        return len(payload)
+    if isinstance(payload, dict):
+        if "columns" in payload:  # columnar series document
+            return payload.get("length", 0)
+        for key in ("data", "results", "tabs"):
+            value = payload.get(key)
+            if isinstance(value, list):
+                return len(value)
+        return 1
+    return 0
+
+
+class TestClientTransport:
+    """HTTP calls through Flask's test client (no network, same process)"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method: str, path: str, **kwargs):
+        response = self.client.open(path, method=method, **kwargs)
+        return response.status_code, response.get_json(silent=True)
+
+
+class RequestsTransport:
+    """HTTP calls against a running server, one keep-alive session per thread"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        if not hasattr(self._local, "session"):
+            import requests
+
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def request(self, method: str, path: str, **kwargs):
+        response = self.session.request(method, self.base_url + path, **kwargs)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+
+def http_cases(transport, names: list, rng: random.Random) -> Dict[str, Callable]:
+    """HTTP endpoint cases; registers and logs in a benchmark user for the authed ones"""
+    email = f"bench-{time.time_ns()}@example.com"
+    password = "benchmark-password"
+    transport.request("POST", "/api/auth/register", json={"name": "Bench", "email": email, "password": password})
+    _, login = transport.request("POST", "/api/auth/login", json={"email": email, "password": password})
+    auth = {"Authorization": f"Bearer {login['access_token']}"}
+
+    tabs = [
+        {"tab_name": f"Tab {i}", "map": {"center": [-37.8, 144.9], "zoom": 6}, "pin": {"location": [-37.8 + i, 144.9]}}
+        for i in range(5)
+    ]
+    transport.request("PUT", "/api/my/tabs", json={"tabs": tabs}, headers=auth)
+
+    def random_point():
+        return {"lat": rng.uniform(-43.5, -10.5), "lng": rng.uniform(113.5, 153.5)}
+
+    def call(method, path, expected=200, **kwargs):
+        status, payload = transport.request(method, path, **kwargs)
+        if status != expected:
+            raise RuntimeError(f"{method} {path} -> {status}: {payload}")
+        return count_rows(payload)
+
+    return {
+        "http.nearest": lambda: call("GET", "/api/weather/nearest?lat={lat}&lng={lng}".format(**random_point())),
+        "http.nearest_batch_50": lambda: call(
+            "POST", "/api/weather/nearest/batch", json={"points": [random_point() for _ in range(50)]}
+        ),
+        "http.avg": lambda: call("GET", f"/api/weather/avg_{quote(rng.choice(names))}"),
+        "http.series": lambda: call("GET", f"/api/weather/{quote(rng.choice(names))}"),
+        "http.series_chart": lambda: call(
+            "GET", f"/api/weather/{quote(rng.choice(names))}?max_points=500&format=columns"
+        ),
+        "http.search": lambda: call("GET", f"/api/search?q={quote(rng.choice(names)[:rng.randint(1, 8)])}"),
+        "http.tabs_get": lambda: call("GET", "/api/my/tabs", headers=auth),
+        "http.tabs_put": lambda: call("PUT", "/api/my/tabs", json={"tabs": tabs}, headers=auth),
+        "http.login": lambda: call("POST", "/api/auth/login", json={"email": email, "password": password}),
+    }
+
+
+def service_cases(app, names: list, rng: random.Random) -> Dict[str, Callable]:
+    """Service-layer cases, called directly inside an app context"""
+    from app.search.controller import search_service
+    from app.tabs.controller import tab_service
+    from app.user.controller import user_service
+    from app.weather.service import weather_service
+
+    email = f"svc-{time.time_ns()}@example.com"
+    user = user_service.create_user("Bench", email, "benchmark-password")
+    tab_service.update_all_tabs(user.uid, [{"tab_name": f"Tab {i}", "map": {"zoom": i}} for i in range(5)])
+
+    def lat_lng():
+        return rng.uniform(-43.5, -10.5), rng.uniform(113.5, 153.5)
+
+    def series(**kwargs):
+        return len(weather_service.get_weather_by_station(rng.choice(names), **kwargs))
+
+    return {
+        "service.nearest": lambda: 1 if weather_service.get_nearest_station(*lat_lng()) else 0,
+        "service.nearest_batch_50": lambda: len(
+            weather_service.get_nearest_stations_batch([lat_lng() for _ in range(50)])
+        ),
+        "service.avg": lambda: len(weather_service.get_avg_weather_by_station(rng.choice(names))),
+        "service.series": series,
+        "service.series_lttb_500": lambda: series(max_points=500),
+        "service.search": lambda: len(search_service.search_stations(rng.choice(names)[:rng.randint(1, 8)])),
+        "service.tabs_get": lambda: len(tab_service.get_user_tabs(user.uid)),
+        "service.login": lambda: 1 if user_service.authenticate_user(email, "benchmark-password") else 0,
+    }
+
+
+def is_auth_case(name: str) -> bool:
+    # bcrypt is deliberately slow, these get their own (smaller) iteration count
+    return name.endswith("login")
+
+
+def run_cases(cases: Dict[str, Callable], args, concurrency: int = 1) -> dict:
+    results = {}
+    for name, fn in cases.items():
+        if args.only and args.only not in name:
+            continue
+        iterations = args.auth_iterations if is_auth_case(name) else args.iterations
+        results[name] = measure(fn, iterations, concurrency=concurrency)
+        print_row(name, results[name])
+    return results
+
+
+def print_header():
+    print(f"{'case':<28}{'iter':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'rows/s':>14}")
+    print("-" * 88)
+
+
+def print_row(name: str, r: dict):
+    rows = f"{r['rows_per_sec']:,.0f}" if r["rows_per_sec"] is not None else "-"
+    print(f"{name:<28}{r['iterations']:>6}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+          f"{r['requests_per_sec']:>10,.0f}{rows:>14}")
+
+
+def compare(results: dict, baseline_path: str, threshold: float) -> int:
+    """Print p50/p95 deltas against a saved baseline, returns the number of regressions"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    print(f"\nCompared with {baseline_path} (regression = p95 more than {threshold:.0%} slower)")
+    print(f"{'case':<28}{'p50 Δ':>10}{'p95 Δ':>10}")
+    regressions = 0
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        d50 = r["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0.0
+        d95 = r["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        flag = ""
+        if d95 > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:<28}{d50:>+10.1%}{d95:>+10.1%}{flag}")
+    return regressions
+
+
+def create_benchmark_app(db_path: str, workdir: str):
+    """The app on a local SQLite database, with its store/caches under workdir"""
+    # Configure before importing the app: database, store and cache settings are read at import/boot
+    os.environ.update({
+        "USE_CLOUD_SQL": "false",
+        "FLASK_DATABASE_PATH": db_path,
+        "WEATHER_STORE_DIR": os.path.join(workdir, "weather_store"),
+        "WEATHER_CACHE_STAMP": os.path.join(workdir, "weather_data.stamp"),
+        "CACHE_DB_PATH": os.path.join(workdir, "cache.db"),
+    })
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import create_app
+
+        return create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WeatherJYJAM services and endpoints")
+    parser.add_argument("--stations", type=int, default=50)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--auth-iterations", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1, help="Client threads issuing HTTP calls at once")
+    parser.add_argument("--only", help="Only run cases whose name contains this string")
+    parser.add_argument("--db", help="SQLite file to seed (default: a temporary file)")
+    parser.add_argument("--no-seed", action="store_true", help="Reuse --db as is")
+    parser.add_argument("--base-url", help="Benchmark a running server over HTTP instead of in-process")
+    parser.add_argument("--save", help="Write results as JSON (e.g. benchmarks/results/baseline.json)")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p95 slowdown counted as a regression")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="weather-bench-")
+    db_path = os.path.abspath(args.db or os.path.join(workdir, "bench.db"))
+    rng = random.Random(args.seed)
+    names = station_names(args.stations)
+
+    if not args.no_seed and not args.base_url:
+        start = time.perf_counter()
+        counts = seed_database(db_path, args.stations, args.years)
+        print(f"Seeded {counts['weather_rows']:,} weather rows in {time.perf_counter() - start:.1f}s -> {db_path}")
+
+    results = {}
+    if args.base_url:
+        print_header()
+        transport = RequestsTransport(args.base_url)
+        results.update(run_cases(http_cases(transport, names, rng), args, args.concurrency))
+    else:
+        app = create_benchmark_app(db_path, workdir)
+
+        with app.app_context():
+            print_header()
+            results.update(run_cases(service_cases(app, names, rng), args))
+
+            # Same series reads once the columnar store exists
+            from app.weather.service import weather_service
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                weather_service.build_store()
+                weather_service.get_store()
+            store_cases = {
+                "service.series_store": lambda: len(weather_service.get_weather_by_station(rng.choice(names))),
+                "service.series_store_lttb_500": lambda: len(
+                    weather_service.get_weather_by_station(rng.choice(names), max_points=500)
+                ),
+            }
+            results.update(run_cases(store_cases, args))
+
+        # Service calls need the app context of this thread, only HTTP cases run concurrently
+        results.update(run_cases(http_cases(TestClientTransport(app), names, rng), args, args.concurrency))
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "stations": args.stations,
+            "years": args.years,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "mode": "http" if args.base_url else "in-process",
+            "base_url": args.base_url,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.compare:
+        if compare(results, args.compare, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Seed a local SQLite database with synthetic weather data for benchmarking.
+
+Creates `stations`, `Dates` and `weather_data` with the same columns as the
+Cloud SQL schema (Database/SQL_Queries, including the station_id migration) at
+a configurable scale:
+
+    python -m benchmarks.seed --db /tmp/bench.db --stations 50 --years 10
+"""
+import argparse
+import math
+import os
+import sqlite3
+from datetime import date, timedelta
+
+import numpy as np
+
+
+SCHEMA = """
+CREATE TABLE stations (
+    station_id   NUMERIC (8)    NOT NULL,
+    `Station Name` VARCHAR (30) NOT NULL PRIMARY KEY,
+    state        VARCHAR (3)    NOT NULL,
+    dist         NUMERIC (3)    NOT NULL,
+    lat          NUMERIC (8, 3) NOT NULL,
+    lon          NUMERIC (8, 3) NOT NULL
+);
+
+CREATE TABLE Dates (
+    Date    DATE        NOT NULL PRIMARY KEY,
+    Month   VARCHAR (3) NOT NULL,
+    Year    NUMERIC (4) NOT NULL,
+    Quarter NUMERIC (1) NOT NULL
+);
+
+CREATE TABLE weather_data (
+    `Station Name`                   VARCHAR (30) NOT NULL,
+    Date                             DATE         NOT NULL,
+    `Rain 0900-0900 (mm)`            NUMERIC,
+    `Maximum Temperature (°C)`       NUMERIC,
+    `Minimum Temperature (°C)`       NUMERIC,
+    `Maximum Relative Humidity (%)`  NUMERIC,
+    `Minimum Relative Humidity (%)`  NUMERIC,
+    `Average 10m Wind Speed (m/sec)` NUMERIC,
+    station_id                       INTEGER,
+    PRIMARY KEY (`Station Name`, Date)
+);
+
+CREATE UNIQUE INDEX ux_stations_station_id ON stations (station_id);
+CREATE INDEX ix_weather_data_station_date ON weather_data (station_id, Date);
+"""
+
+PLACES = [
+    "MELBOURNE", "SYDNEY", "BRISBANE", "PERTH", "ADELAIDE", "HOBART", "DARWIN", "CANBERRA",
+    "ALICE SPRINGS", "CAIRNS", "TOWNSVILLE", "GEELONG", "BALLARAT", "BENDIGO", "MILDURA",
+    "WAGGA WAGGA", "DUBBO", "ALBURY", "LAUNCESTON", "BROOME", "KALGOORLIE", "MACKAY",
+    "ROCKHAMPTON", "TOOWOOMBA", "ESPERANCE", "PORT HEDLAND", "GERALDTON", "ORANGE",
+]
+SUFFIXES = ["AIRPORT", "AWS", "(OLYMPIC PARK)", "AERO", "POST OFFICE", "RESEARCH STATION"]
+STATES = ["VIC", "NSW", "QLD", "WA", "SA", "TAS", "NT", "ACT"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def station_names(count: int) -> list:
+    names = []
+    for i in range(count):
+        place = PLACES[i % len(PLACES)]
+        suffix = SUFFIXES[(i // len(PLACES)) % len(SUFFIXES)]
+        lap = i // (len(PLACES) * len(SUFFIXES))
+        names.append(f"{place} {suffix}" + (f" {lap}" if lap else ""))
+    return names
+
+
+def seed_database(path: str, stations: int = 50, years: int = 10, start_year: int = 2000, seed: int = 42) -> dict:
+    """Create and fill the weather tables at `path` (replacing it), returns row counts"""
+    if os.path.exists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+
+    names = station_names(stations)
+    lats = rng.uniform(-43.5, -10.5, stations).round(3)
+    lons = rng.uniform(113.5, 153.5, stations).round(3)
+    conn.executemany(
+        "INSERT INTO stations VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (10000 + i, name, STATES[i % len(STATES)], int(rng.integers(1, 100)), float(lats[i]), float(lons[i]))
+            for i, name in enumerate(names)
+        ],
+    )
+
+    first, last = date(start_year, 1, 1), date(start_year + years, 1, 1)
+    days = [first + timedelta(n) for n in range((last - first).days)]
+    conn.executemany(
+        "INSERT INTO Dates VALUES (?, ?, ?, ?)",
+        [(d.isoformat(), MONTHS[d.month - 1], d.year, (d.month - 1) // 3 + 1) for d in days],
+    )
+
+    day_iso = [d.isoformat() for d in days]
+    season = np.array([math.cos(2 * math.pi * (d.timetuple().tm_yday - 15) / 365.25) for d in days])
+    n = len(days)
+    for i, name in enumerate(names):
+        warmth = 12 + (lats[i] + 43.5) * 0.5  # warmer further north
+        max_t = warmth + 8 + 6 * season + rng.normal(0, 3, n)
+        min_t = max_t - rng.uniform(6, 12, n)
+        rain = np.where(rng.random(n) < 0.3, rng.gamma(1.5, 4, n), 0.0)
+        max_rh = np.clip(rng.normal(80, 10, n), 20, 100)
+        min_rh = np.clip(max_rh - rng.uniform(15, 45, n), 5, 100)
+        wind = np.abs(rng.normal(4, 2, n))
+        missing = rng.random(n) < 0.02  # gaps, like the real data
+
+        rows = zip(
+            [name] * n, day_iso,
+            *(
+                [None if m else round(float(v), 1) for v, m in zip(values, missing)]
+                for values in (rain, max_t, min_t, max_rh, min_rh, wind)
+            ),
+            [10000 + i] * n,
+        )
+        conn.executemany("INSERT INTO weather_data VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    conn.commit()
+    conn.close()
+    return {"stations": stations, "days": n, "weather_rows": stations * n}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a SQLite database with synthetic weather data")
+    parser.add_argument("--db", required=True, help="SQLite file to (re)create")
+    parser.add_argument("--stations", type=int, default=50)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--start-year", type=int, default=2000)
+    args = parser.parse_args()
+
+    counts = seed_database(args.db, args.stations, args.years, args.start_year)
+    print(f"Seeded {args.db}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# gunicorn.conf.py
+# Production server: gunicorn -c gunicorn.conf.py server:app
+import gc
+import multiprocessing
+import os
+
+# Bind to Railway's port if provided (same default as server.py)
+bind = f"0.0.0.0:{os.getenv('PORT', '2333')}"
+
+# Worker processes x threads: slow Cloud SQL queries and open AI SSE streams
+# only hold one thread, not the whole server
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# Build the app (and the station/search indexes) once in the master, workers share it copy-on-write
+preload_app = True
+
+# AI search streams can run for a while; graceful_timeout bounds reloads/shutdowns
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers now and then (0 = never), jittered so they don't all restart together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 50))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    # Workers open their own connections; the master shouldn't hold any open
+    from app.database import close_pool
+    from app.weather.service import weather_service
+    from server import app
+
+    # Build the monthly rollups once here rather than racing from every worker's first avg_ request
+    with app.app_context():
+        try:
+            count = weather_service.build_monthly_rollups()
+            if count:
+                server.log.info(f"Built monthly rollups: {count} station-months")
+        except Exception as e:
+            server.log.warning(f"Monthly rollups not built, avg_ aggregates weather_data until they are: {e}")
+
+    close_pool(app)
+
+    # Everything allocated during preload is long-lived: move it out of the GC's reach so
+    # collections in the workers don't touch (and copy) the shared pages
+    gc.freeze()
+    server.log.info(f"🚀 Serving with {workers} workers x {threads} threads")
+
+
+def post_fork(server, worker):
+    # Sockets must not be shared across processes: forget anything inherited from the
+    # master and open this worker's own DB_POOL_WARMUP connections
+    from app.database import dispose_after_fork
+    from server import app
+
+    dispose_after_fork(app)
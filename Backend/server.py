@@ -4,5 +4,6 @@ from app import create_app
 app = create_app()
 
 if __name__ == "__main__":
+    # Development server only, production runs gunicorn (see gunicorn.conf.py / Procfile)
     port = int(os.environ.get("PORT", 2333))  # Use Railway's port if provided
     app.run(host="0.0.0.0", port=port, debug=False)
\ No newline at end of file
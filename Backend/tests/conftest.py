@@ -0,0 +1,43 @@
+"""
+One app for the whole test session (the API blueprint can only be registered once),
+set up like the README's two-SQLite-file read replica example: an empty primary for
+users, tabs and rollup writes, and a read-only copy holding the weather tables.
+"""
+import os
+
+import pytest
+
+from benchmarks.seed import seed_database
+
+
+@pytest.fixture(scope="session")
+def replica_path(tmp_path_factory):
+    return str(tmp_path_factory.getbasetemp() / "replica.db")
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory, replica_path):
+    workdir = tmp_path_factory.getbasetemp()
+    seed_database(replica_path, stations=3, years=1)
+
+    env = {
+        "USE_CLOUD_SQL": "false",
+        "FLASK_DATABASE_PATH": str(workdir / "primary.db"),
+        "FLASK_READ_DATABASE_PATH": replica_path,
+        "WEATHER_STORE_DIR": str(workdir / "weather_store"),
+        "WEATHER_PARQUET_PATH": str(workdir / "weather_data.parquet"),
+        "WEATHER_CACHE_STAMP": str(workdir / "weather_data.stamp"),
+        "CACHE_DB_PATH": str(workdir / "cache.db"),
+    }
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        from app import create_app
+
+        yield create_app()
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
@@ -0,0 +1,54 @@
+"""
+Chart reductions of station series: resampling and LTTB downsampling.
+
+    python -m pytest tests
+"""
+import numpy as np
+
+from app.weather.downsample import lttb, resample
+
+
+def seasonal(n=3650, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype=np.int64)
+    return x, 20 + 8 * np.sin(2 * np.pi * x / 365.25) + rng.normal(0, 2, n)
+
+
+def test_lttb_length_and_endpoints():
+    x, y = seasonal()
+
+    keep = lttb(x, y, 500)
+
+    assert len(keep) == 500
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert (np.diff(keep) > 0).all()
+
+
+def test_lttb_keeps_spikes():
+    x, y = seasonal()
+    y[1234] = 60.0
+    y[2345] = -20.0
+
+    keep = lttb(x, y, 200)
+
+    assert 1234 in keep
+    assert 2345 in keep
+
+
+def test_lttb_fills_gaps_and_skips_short_series():
+    x, y = seasonal(n=400)
+    y[10:50] = np.nan
+
+    assert len(lttb(x, y, 100)) == 100
+    assert (lttb(x, y, 400) == np.arange(400)).all()
+    assert (lttb(x, y, 2) == np.arange(400)).all()
+
+
+def test_resample_monthly_ignores_missing_days():
+    dates = np.arange('2000-01-30', '2000-02-03', dtype='datetime64[D]')
+    values = np.array([1.0, np.nan, 3.0, 5.0])
+
+    bucketed, columns = resample(dates, {'t': values}, 'monthly')
+
+    assert bucketed.tolist() == list(np.array(['2000-01-30', '2000-02-01'], dtype='datetime64[D]'))
+    assert columns['t'].tolist() == [1.0, 4.0]
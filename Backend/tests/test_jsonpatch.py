@@ -0,0 +1,59 @@
+"""
+JSON Patch (RFC 6902) helper used by PATCH /api/my/tabs/<id>.
+
+    python -m pytest tests
+"""
+import pytest
+
+from app._utils.jsonpatch import JsonPatchError, apply_patch, parse_pointer
+
+
+DOC = {'tab_name': 'Home', 'pin': {'pins': [{'position': [0, 0]}, {'position': [1, 1]}]}}
+
+
+def test_parse_pointer_unescapes():
+    assert parse_pointer('') == []
+    assert parse_pointer('/a/b~1c/~00') == ['a', 'b/c', '~0']
+
+
+def test_operations():
+    patched = apply_patch(DOC, [
+        {'op': 'test', 'path': '/tab_name', 'value': 'Home'},
+        {'op': 'replace', 'path': '/pin/pins/0/position', 'value': [-37.8, 144.9]},
+        {'op': 'add', 'path': '/pin/pins/-', 'value': {'position': [2, 2]}},
+        {'op': 'remove', 'path': '/pin/pins/1'},
+        {'op': 'copy', 'from': '/tab_name', 'path': '/title'},
+        {'op': 'move', 'from': '/title', 'path': '/label'},
+    ])
+
+    assert patched == {
+        'tab_name': 'Home',
+        'label': 'Home',
+        'pin': {'pins': [{'position': [-37.8, 144.9]}, {'position': [2, 2]}]},
+    }
+    # The input is never modified
+    assert DOC['pin']['pins'][0]['position'] == [0, 0]
+
+
+@pytest.mark.parametrize("operations", [
+    [{'op': 'test', 'path': '/tab_name', 'value': 'Work'}],
+    [{'op': 'replace', 'path': '/missing/key', 'value': 1}],
+    [{'op': 'remove', 'path': '/pin/pins/5'}],
+    [{'op': 'add', 'path': '/pin/pins/01', 'value': 1}],
+    [{'op': 'replace', 'path': '', 'value': {}}],
+    [{'op': 'move', 'from': '/pin', 'path': '/pin/inner'}],
+    [{'op': 'add', 'path': '/tab_name'}],
+    [{'op': 'frobnicate', 'path': '/tab_name'}],
+    ['not an operation'],
+    {'op': 'add'},
+])
+def test_bad_patches_raise(operations):
+    with pytest.raises(JsonPatchError):
+        apply_patch(DOC, operations)
+
+
+def test_failed_patch_applies_nothing():
+    doc = {'a': 1}
+    with pytest.raises(JsonPatchError):
+        apply_patch(doc, [{'op': 'replace', 'path': '/a', 'value': 2}, {'op': 'remove', 'path': '/b'}])
+    assert doc == {'a': 1}
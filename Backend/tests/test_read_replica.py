@@ -0,0 +1,35 @@
+"""
+Weather reads against the two-SQLite-file read replica setup from the README
+(see conftest.py).
+
+    python -m pytest tests
+"""
+import sqlite3
+from urllib.parse import quote
+
+from benchmarks.seed import station_names
+
+
+def test_avg_aggregates_on_replica_without_rollups(app, replica_path):
+    station = station_names(1)[0]
+
+    response = app.test_client().get(f"/api/weather/avg_{quote(station)}")
+
+    assert response.status_code == 200
+    rows = response.get_json()
+    assert len(rows) == 12
+    assert {row["Station Name"] for row in rows} == {station}
+    assert rows[0]["Date"] == "2000-01-01"
+
+    # Nothing was written to the read-only copy
+    tables = {name for (name,) in sqlite3.connect(replica_path).execute("SELECT name FROM sqlite_master")}
+    assert "weather_monthly" not in tables
+
+
+def test_station_series_reads_replica(app):
+    station = station_names(1)[0]
+
+    response = app.test_client().get(f"/api/weather/{quote(station)}?start=2000-03-01&end=2000-03-31")
+
+    assert response.status_code == 200
+    assert len(response.get_json()) == 31
@@ -0,0 +1,72 @@
+"""
+Local AI search router: which queries skip the model's tool-choice call.
+
+    python -m pytest tests
+"""
+import pytest
+
+from app.search.index import StationSearchIndex
+from app.search.router import IntentRouter
+
+
+STATIONS = [
+    {'Station Name': 'MELBOURNE (OLYMPIC PARK)', 'state': 'VIC', 'lat': -37.83, 'lon': 144.98},
+    {'Station Name': 'MELBOURNE AIRPORT', 'state': 'VIC', 'lat': -37.67, 'lon': 144.83},
+    {'Station Name': 'SYDNEY (OBSERVATORY HILL)', 'state': 'NSW', 'lat': -33.86, 'lon': 151.21},
+    {'Station Name': 'DARWIN AIRPORT', 'state': 'NT', 'lat': -12.42, 'lon': 130.89},
+    {'Station Name': 'HOBART (ELLERSLIE ROAD)', 'state': 'TAS', 'lat': -42.89, 'lon': 147.33},
+]
+
+
+@pytest.fixture(scope="module")
+def router():
+    index = StationSearchIndex(STATIONS)
+    return IntentRouter(lambda: index)
+
+
+def test_live_weather_for_known_place(router):
+    route = router.route("What's the weather in Melbourne today?")
+
+    assert route['intent'] == 'live'
+    assert route['location'] == 'Melbourne'
+    assert route['station']['Station Name'] == 'MELBOURNE (OLYMPIC PARK)'
+
+
+def test_bare_station_name(router):
+    route = router.route("Hobart forecast")
+
+    assert route['intent'] == 'live'
+    assert route['location'] == 'Hobart'
+
+
+def test_place_ends_at_question_words(router):
+    route = router.route("What should I wear in Sydney when it is cold")
+
+    assert route['intent'] == 'live'
+    assert route['location'] == 'Sydney'
+
+
+def test_history_with_year(router):
+    route = router.route("Average rainfall at Sydney in 2019")
+
+    assert route['intent'] == 'history'
+    assert route['station']['Station Name'] == 'SYDNEY (OBSERVATORY HILL)'
+    assert route['years'] == [2019]
+
+
+@pytest.mark.parametrize("query", [
+    "Is Darwin hot in December?",
+    "Does it rain much in Melbourne in winter?",
+    "Weather in Atlantis today",
+    "Will it rain in Sydney Harbour Bridge tomorrow",
+    "What's the weather like?",
+])
+def test_unsure_queries_go_to_the_model(router, query):
+    assert router.route(query) is None
+
+
+def test_catalog_unavailable():
+    def broken():
+        raise RuntimeError("no database")
+
+    assert IntentRouter(broken).route("weather in Melbourne") is None
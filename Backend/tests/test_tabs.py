@@ -0,0 +1,154 @@
+"""
+Tab sync: PUT /api/my/tabs diffing, JSON Patch updates and version conflicts.
+
+    python -m pytest tests
+"""
+import pytest
+
+
+@pytest.fixture(scope="module")
+def client(app):
+    client = app.test_client()
+    client.post("/api/auth/register", json={"name": "Tab Tester", "email": "tabs@example.com", "password": "secret"})
+    token = client.post("/api/auth/login", json={"email": "tabs@example.com", "password": "secret"}).get_json()["access_token"]
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    return client
+
+
+def sync(client, tabs):
+    return client.put("/api/my/tabs", json={"tabs": tabs})
+
+
+@pytest.fixture
+def tabs(client):
+    """Exactly two tabs, [Home, Work] (tabs left from earlier tests are reused in order or deleted)"""
+    response = sync(client, [
+        {"tab_name": "Home", "map": {"zoom": 5}, "pin": {"pins": [{"position": [0, 0]}]}},
+        {"tab_name": "Work", "map": {"zoom": 8}, "pin": None},
+    ])
+    assert response.status_code == 200
+    return response.get_json()["tabs"]
+
+
+def test_sync_writes_only_changes(client, tabs):
+    home, work = tabs
+
+    response = sync(client, [
+        {**home},
+        {**work, "tab_name": "Office"},
+        {"tab_name": "Trip"},
+    ])
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["changes"] == {"created": 1, "updated": 1, "deleted": 0, "unchanged": 1}
+    synced = {tab["id"]: tab for tab in body["tabs"]}
+    assert synced[home["id"]]["version"] == home["version"]
+    assert synced[work["id"]]["tab_name"] == "Office"
+    assert synced[work["id"]]["version"] == work["version"] + 1
+
+
+def test_sync_matches_tabs_without_ids_in_order(client, tabs):
+    home, work = tabs
+
+    response = sync(client, [{"tab_name": "Home", "map": home["map"], "pin": home["pin"]}, {"tab_name": "Gym"}])
+
+    body = response.get_json()
+    assert body["changes"] == {"created": 0, "updated": 1, "deleted": 0, "unchanged": 1}
+    assert [tab["id"] for tab in body["tabs"]] == [home["id"], work["id"]]
+    assert body["tabs"][1]["tab_name"] == "Gym"
+
+
+def test_sync_deletes_tabs_left_out(client, tabs):
+    home, work = tabs
+
+    body = sync(client, [{**work}]).get_json()
+
+    assert body["changes"]["deleted"] == 1
+    assert [tab["id"] for tab in body["tabs"]] == [work["id"]]
+
+
+def test_sync_stale_version_conflicts(client, tabs):
+    home, work = tabs
+
+    response = sync(client, [{**home}, {**work, "tab_name": "Office", "version": work["version"] - 1}])
+
+    assert response.status_code == 409
+    assert response.get_json()["tab_id"] == work["id"]
+    assert response.get_json()["version"] == work["version"]
+    # Nothing was written
+    stored = client.get(f"/api/my/tabs/{work['id']}").get_json()
+    assert stored["tab_name"] == "Work"
+
+
+@pytest.mark.parametrize("entry", [
+    {"id": "1", "tab_name": "Home"},
+    {"tab_name": None},
+    {"tab_name": ""},
+    {"tab_name": 42},
+    {"tab_name": "x" * 101},
+    {"tab_name": "Home", "version": "latest"},
+])
+def test_sync_rejects_bad_entries(client, tabs, entry):
+    assert sync(client, [entry]).status_code == 400
+
+
+def test_sync_rejects_duplicate_ids(client, tabs):
+    home, _ = tabs
+
+    response = sync(client, [{**home}, {**home, "tab_name": "Copy"}])
+
+    assert response.status_code == 400
+
+
+def test_patch_updates_one_pin(client, tabs):
+    home, _ = tabs
+
+    response = client.patch(f"/api/my/tabs/{home['id']}", json=[
+        {"op": "test", "path": "/version", "value": home["version"]},
+        {"op": "replace", "path": "/pin/pins/0/position", "value": [-37.81, 144.96]},
+    ])
+
+    assert response.status_code == 200
+    tab = response.get_json()["tab"]
+    assert tab["pin"] == {"pins": [{"position": [-37.81, 144.96]}]}
+    assert tab["map"] == home["map"]
+    assert tab["version"] == home["version"] + 1
+    assert response.headers["ETag"] == f'"tab-{home["id"]}-v{home["version"] + 1}"'
+
+
+def test_patch_if_match(client, tabs):
+    home, _ = tabs
+    operations = [{"op": "replace", "path": "/tab_name", "value": "House"}]
+
+    stale = client.patch(f"/api/my/tabs/{home['id']}", json=operations,
+                         headers={"If-Match": f'"tab-{home["id"]}-v{home["version"] + 5}"'})
+    assert stale.status_code == 409
+    assert stale.get_json()["version"] == home["version"]
+
+    current = client.patch(f"/api/my/tabs/{home['id']}", json=operations, headers={"If-Match": home["etag"]})
+    assert current.status_code == 200
+    assert current.get_json()["tab"]["tab_name"] == "House"
+
+
+def test_patch_stale_version_test_conflicts(client, tabs):
+    home, _ = tabs
+
+    response = client.patch(f"/api/my/tabs/{home['id']}", json=[
+        {"op": "test", "path": "/version", "value": home["version"] - 1},
+        {"op": "replace", "path": "/tab_name", "value": "House"},
+    ])
+
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize("operations", [
+    [{"op": "replace", "path": "/version", "value": 99}],
+    [{"op": "replace", "path": "/tab_name", "value": None}],
+    [{"op": "remove", "path": "/pin/pins/3"}],
+    {"op": "replace"},
+])
+def test_patch_rejects_bad_patches(client, tabs, operations):
+    home, _ = tabs
+
+    assert client.patch(f"/api/my/tabs/{home['id']}", json=operations).status_code == 400